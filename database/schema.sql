@@ -97,6 +97,43 @@ CREATE TABLE IF NOT EXISTS pipeline_runs (
     error_message TEXT
 );
 
+CREATE TABLE IF NOT EXISTS source_manifest (
+    manifest_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER,
+    source_name VARCHAR(100),
+    source_path TEXT,
+    file_size INTEGER,
+    file_mtime REAL,
+    content_hash VARCHAR(64),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (run_id) REFERENCES pipeline_runs(run_id)
+);
+
+CREATE TABLE IF NOT EXISTS source_watermarks (
+    source_name VARCHAR(100) PRIMARY KEY,
+    watermark_column VARCHAR(100),
+    high_water_mark BLOB,
+    run_id INTEGER,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (run_id) REFERENCES pipeline_runs(run_id)
+);
+
+CREATE TABLE IF NOT EXISTS parsed_dates (
+    date_format VARCHAR(100),
+    raw_value TEXT,
+    parsed_ns INTEGER,
+    PRIMARY KEY (date_format, raw_value)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS quality_key_index (
+    table_name VARCHAR(100),
+    column_name VARCHAR(100),
+    key_value,
+    owner_key,
+    run_id INTEGER,
+    PRIMARY KEY (table_name, column_name, key_value)
+) WITHOUT ROWID;
+
 CREATE TABLE IF NOT EXISTS data_quality_logs (
     log_id INTEGER PRIMARY KEY AUTOINCREMENT,
     run_id INTEGER,
@@ -106,4 +143,31 @@ CREATE TABLE IF NOT EXISTS data_quality_logs (
     details TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (run_id) REFERENCES pipeline_runs(run_id)
+);
+
+CREATE TABLE IF NOT EXISTS memory_reports (
+    run_id INTEGER,
+    stage VARCHAR(50),
+    execution_mode VARCHAR(20),
+    peak_bytes INTEGER,
+    retained_bytes INTEGER,
+    PRIMARY KEY (run_id, stage),
+    FOREIGN KEY (run_id) REFERENCES pipeline_runs(run_id)
+);
+
+CREATE TABLE IF NOT EXISTS data_profiles (
+    profile_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER,
+    table_name VARCHAR(100),
+    column_name VARCHAR(100),
+    row_count INTEGER,
+    null_count INTEGER,
+    distinct_estimate INTEGER,
+    min_value TEXT,
+    max_value TEXT,
+    quantiles TEXT,
+    top_values TEXT,
+    sketch TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (run_id) REFERENCES pipeline_runs(run_id)
 );
\ No newline at end of file
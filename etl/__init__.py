@@ -2,7 +2,8 @@
 ETL module for the sales analytics pipeline
 """
 from .pipeline import SalesDataPipeline
+from .readers import SourceReader
 from .transformations import DataTransformer
 from .quality_checks import DataQualityManager
 
-__all__ = ['SalesDataPipeline', 'DataTransformer', 'DataQualityManager']
\ No newline at end of file
+__all__ = ['SalesDataPipeline', 'SourceReader', 'DataTransformer', 'DataQualityManager']
\ No newline at end of file
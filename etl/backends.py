@@ -0,0 +1,178 @@
+"""
+Column compute backends for the sales analytics pipeline
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+class PandasBackend:
+    """Column primitives implemented with pandas and numpy"""
+
+    name = 'pandas'
+
+    def standardize_text(self, series, case):
+        """Strip whitespace and apply case ('upper', 'lower' or 'title')"""
+        return getattr(series.str.strip().str, case)()
+
+    def split_part(self, series, separator, index):
+        """Return part index of each value split on separator (NaN when out of range)"""
+        return series.str.split(separator).str[index]
+
+    def date_parts(self, days):
+        """Return the calendar attributes of a DatetimeIndex of normalized dates"""
+        return {
+            'date_key': (days.year * 10000 + days.month * 100 + days.day).astype('int64'),
+            'year': days.year,
+            'quarter': days.quarter,
+            'month': days.month,
+            'day': days.day,
+            'day_of_week': days.dayofweek,
+            'is_weekend': days.dayofweek.isin([5, 6])
+        }
+
+    def bucket(self, series, bins, labels=None):
+        """Bin values into right-closed intervals, like pd.cut"""
+        return pd.cut(series, bins=bins, labels=labels)
+
+    def lookup(self, left, right, on, columns):
+        """Left-join columns of right onto left by key, keeping left row order"""
+        return left.merge(right[[on] + columns], on=on, how='left')
+
+class ArrowBackend(PandasBackend):
+    """Column primitives implemented with pyarrow.compute kernels
+
+    Results match the pandas backend value for value, including which missing
+    marker (None or NaN) a row ends up with, except for Unicode case mapping:
+    utf8_upper/utf8_title map one character to one character, so text needing
+    special casing (e.g. 'ß' -> 'SS', ligatures such as 'ﬁ') comes out differently
+    from Python's str methods. The backend is therefore opt-in. Inputs the kernels
+    cannot express, such as non-string text columns or negative split indexes,
+    fall back to pandas.
+    """
+
+    name = 'arrow'
+
+    def standardize_text(self, series, case):
+        """Strip whitespace and apply case ('upper', 'lower' or 'title')"""
+        arr = self._to_strings(series)
+        if arr is None:
+            return super().standardize_text(series, case)
+
+        arr = getattr(pc, f'utf8_{case}')(pc.utf8_trim_whitespace(arr))
+        return self._to_series(arr, series)
+
+    def split_part(self, series, separator, index):
+        """Return part index of each value split on separator (NaN when out of range)"""
+        arr = self._to_strings(series)
+        if arr is None or index < 0:
+            return super().split_part(series, separator, index)
+
+        parts = pc.split_pattern(arr, separator)
+        in_range = pc.fill_null(pc.greater(pc.list_value_length(parts), index), False)
+        positions = pc.if_else(in_range, pc.add(parts.offsets[:-1], index), None)
+        result = self._to_series(pc.take(parts.values, positions), series)
+
+        # Values with too few parts are NaN, as with pandas .str[index]
+        out_of_range = ~in_range.to_numpy(zero_copy_only=False) & series.notna().to_numpy()
+        if out_of_range.any():
+            result[out_of_range] = np.nan
+
+        return result
+
+    def date_parts(self, days):
+        """Return the calendar attributes of a DatetimeIndex of normalized dates"""
+        arr = pa.array(days)
+        year, month, day = pc.year(arr), pc.month(arr), pc.day(arr)
+        day_of_week = pc.day_of_week(arr)
+
+        def values(result, dtype):
+            return result.to_numpy(zero_copy_only=False).astype(dtype)
+
+        return {
+            'date_key': values(pc.add(pc.add(pc.multiply(year, 10000), pc.multiply(month, 100)), day), 'int64'),
+            'year': values(year, 'int32'),
+            'quarter': values(pc.quarter(arr), 'int32'),
+            'month': values(month, 'int32'),
+            'day': values(day, 'int32'),
+            'day_of_week': values(day_of_week, 'int32'),
+            'is_weekend': values(pc.greater_equal(day_of_week, 5), 'bool')
+        }
+
+    def bucket(self, series, bins, labels=None):
+        """Bin values into right-closed intervals, like pd.cut"""
+        if labels is None or labels is False or len(series) == 0:
+            return super().bucket(series, bins, labels)
+
+        arr = pa.array(series, from_pandas=True).cast(pa.float64())
+        conditions = [pc.and_(pc.greater(arr, lower), pc.less_equal(arr, upper))
+                      for lower, upper in zip(bins[:-1], bins[1:])]
+        codes = pc.case_when(pc.make_struct(*conditions, field_names=[str(i) for i in range(len(conditions))]),
+                             *[pa.scalar(i, pa.int8()) for i in range(len(conditions))])
+        codes = pc.fill_null(codes, -1).to_numpy(zero_copy_only=False)
+
+        return pd.Series(pd.Categorical.from_codes(codes, categories=labels, ordered=True),
+                         index=series.index, name=series.name)
+
+    def lookup(self, left, right, on, columns):
+        """Left-join columns of right onto left by key, keeping left row order
+
+        Keys are matched with a hash lookup (right keys must be unique); the
+        right columns are then gathered by position, so no sort is needed.
+        """
+        if not right[on].is_unique or any(col in left.columns for col in columns):
+            return super().lookup(left, right, on, columns)
+
+        keys = pa.array(left[on], from_pandas=True)
+        right_keys = pa.array(right[on], from_pandas=True)
+        if right_keys.type != keys.type:
+            # Compacted frames can hold the same key in different integer widths
+            common = pa.int64() if pa.types.is_integer(keys.type) and pa.types.is_integer(right_keys.type) \
+                else keys.type
+            keys, right_keys = keys.cast(common), right_keys.cast(common)
+
+        positions = pc.fill_null(pc.index_in(keys, value_set=right_keys), -1).to_numpy(zero_copy_only=False)
+
+        result = left.reset_index(drop=True)
+        for col in columns:
+            result[col] = pd.api.extensions.take(right[col].array, positions, allow_fill=True)
+
+        return result
+
+    def _to_strings(self, series):
+        """Convert a text column to an Arrow string array, or None if it is not one"""
+        try:
+            arr = pa.array(series, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return None
+
+        if isinstance(arr, pa.ChunkedArray):
+            arr = arr.combine_chunks()
+
+        return arr if pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type) else None
+
+    def _to_series(self, arr, like):
+        """Wrap a kernel result as a Series shaped like the input column"""
+        if isinstance(like.dtype, pd.ArrowDtype):
+            return pd.Series(pd.arrays.ArrowExtensionArray(arr), index=like.index, name=like.name)
+
+        values = arr.to_numpy(zero_copy_only=False)
+
+        # Keep each missing input's own marker (None or NaN), as pandas string methods do
+        missing = like.isna().to_numpy()
+        if missing.any():
+            values[missing] = like.to_numpy()[missing]
+
+        return pd.Series(values, index=like.index, name=like.name)
+
+BACKENDS = {
+    'pandas': PandasBackend,
+    'arrow': ArrowBackend
+}
+
+def get_backend(name='pandas'):
+    """Return the compute backend registered under name"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unsupported transform backend: {name}")
+
+    return BACKENDS[name]()
@@ -0,0 +1,84 @@
+"""
+Frame compaction between pipeline stages
+"""
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+class FrameCompactor:
+    """Shrinks frames between pipeline stages
+
+    Integer columns are downcast to the smallest type holding their values and
+    float columns to float32 only when every value round-trips exactly. Columns
+    holding a single value can be moved into df.attrs['constants'] as scalars.
+    Downcast integers keep their values, but arithmetic that builds new values
+    on them (e.g. multiplying two int8 columns) must cast to a wider type first.
+    """
+
+    def __init__(self, exclude=None, report=False):
+        self.exclude = set(exclude or [])
+        self.report = report
+
+    def compact(self, df, label=None, fold_constants=False, keep=()):
+        """Compact df in place and return it; constants not in keep move to attrs when fold_constants
+
+        Like the transforms, compaction takes ownership of the frame it is given.
+        """
+        before = df.memory_usage(deep=True).sum() if self.report else 0
+        keep = set(keep)
+        downcast = 0
+        constants = {}
+
+        for col in df.columns:
+            if col in self.exclude:
+                continue
+
+            series = df[col]
+            if fold_constants and col not in keep and len(series) > 1 and self._is_constant(series):
+                constants[col] = series.iloc[0]
+                continue
+
+            compacted = self._downcast(series)
+            if compacted is not series:
+                df[col] = compacted
+                downcast += 1
+
+        if constants:
+            df.drop(columns=list(constants), inplace=True)
+            df.attrs['constants'] = {**df.attrs.get('constants', {}), **constants}
+
+        if self.report and len(df):
+            after = df.memory_usage(deep=True).sum()
+            logger.info(f"Compacted {label or 'frame'}: {before / len(df):.1f} -> {after / len(df):.1f} bytes/row"
+                        f" ({downcast} downcast, {len(constants)} folded to constants)")
+
+        return df
+
+    def _downcast(self, series):
+        """Return the series in its smallest lossless numeric type (or the series itself)"""
+        dtype = series.dtype
+        # Masked integers (Int64, UInt32, ...) downcast like numpy ones and keep their NA mask
+        if pd.api.types.is_integer_dtype(dtype):
+            downcast = pd.to_numeric(series, downcast='unsigned' if dtype.kind == 'u' else 'integer')
+            return downcast if downcast.dtype.itemsize < dtype.itemsize else series
+
+        if not isinstance(dtype, np.dtype) or dtype.kind != 'f' or dtype.itemsize <= 4:
+            return series
+
+        values = series.to_numpy()
+        narrowed = values.astype(np.float32)
+        with np.errstate(over='ignore', invalid='ignore'):
+            lossless = np.array_equal(narrowed.astype(dtype), values, equal_nan=True)
+
+        return pd.Series(narrowed, index=series.index, name=series.name) if lossless else series
+
+    def _is_constant(self, series):
+        """Check whether a column holds one non-missing value in every row"""
+        if series.isna().any():
+            return False
+
+        try:
+            return bool((series == series.iloc[0]).all())
+        except (TypeError, ValueError):
+            # Values that do not compare elementwise (lists, arrays) are never folded
+            return False
@@ -0,0 +1,127 @@
+"""
+Date handling helpers for the sales analytics pipeline
+"""
+import numpy as np
+import pandas as pd
+from etl.backends import PandasBackend
+
+class CalendarCache:
+    """Calendar attributes computed once per distinct date and gathered back onto rows"""
+
+    FEATURES = ['date_key', 'year', 'quarter', 'month', 'day', 'day_of_week', 'is_weekend']
+
+    def __init__(self, backend=None):
+        self.backend = backend or PandasBackend()
+        self._table = self._compute(pd.DatetimeIndex([]))
+
+    def __len__(self):
+        return len(self._table)
+
+    def _compute(self, days):
+        """Compute calendar attributes for a DatetimeIndex of normalized dates"""
+        return pd.DataFrame(self.backend.date_parts(days), index=days)
+
+    def features(self, dates, columns=None):
+        """Return calendar attributes for every row of a datetime Series
+
+        The column is factorized once; only dates not seen before are computed,
+        and the per-date attributes are gathered back onto the rows by position.
+        Missing dates (NaT) yield NaN, and False for is_weekend.
+        """
+        columns = columns or self.FEATURES
+        codes, uniques = pd.factorize(dates)
+        days = pd.DatetimeIndex(uniques).normalize()
+
+        new_days = days.unique().difference(self._table.index)
+        if len(new_days):
+            self._table = pd.concat([self._table, self._compute(new_days)])
+
+        rows = self._table.index.get_indexer(days)[codes]
+        missing = codes < 0
+
+        result = {}
+        for col in columns:
+            values = self._table[col].to_numpy()[rows]
+            if missing.any():
+                values = values.copy() if col == 'is_weekend' else values.astype('float64')
+                values[missing] = False if col == 'is_weekend' else np.nan
+            result[col] = values
+
+        return pd.DataFrame(result, index=dates.index)
+
+class DateParser:
+    """Parses date values with a configured format, converting each distinct value once
+
+    Parsed values are cached across calls, so later chunks only parse strings
+    they have not seen before. The pipeline carries the cache across runs by
+    seeding it from PipelineStateStore and persisting the values each batch
+    adds; only a parser with track_new=True keeps those values until drained.
+    Values that do not match the configured format have their format inferred,
+    so timestamp-form strings still parse under a date-only format.
+    """
+
+    def __init__(self, date_format=None, max_cache_size=1000000, track_new=False):
+        self.date_format = date_format
+        self.max_cache_size = max_cache_size
+        self.track_new = track_new
+        self._cache = None
+        self._new = []
+
+    def seed(self, parsed):
+        """Add previously parsed values (a datetime Series indexed by the raw strings) to the cache"""
+        if parsed is None or len(parsed) == 0:
+            return
+
+        parsed = parsed.iloc[:self.max_cache_size]
+        if self._cache is None:
+            self._cache = parsed
+        else:
+            self._cache = pd.concat([self._cache, parsed[~parsed.index.isin(self._cache.index)]])
+
+    def drain_new(self):
+        """Return the string values parsed since the last drain, for persisting"""
+        new, self._new = self._new, []
+        if not new:
+            return pd.Series([], dtype='datetime64[ns]')
+
+        parsed = pd.concat(new)
+        return parsed[[isinstance(value, str) for value in parsed.index]]
+
+    def parse(self, values):
+        """Return values as a datetime Series; already-parsed columns are passed through"""
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values
+
+        codes, uniques = pd.factorize(values)
+        if len(uniques) == 0:
+            return pd.Series(pd.NaT, index=values.index, name=values.name, dtype='datetime64[ns]')
+
+        # Bound the cache for high-cardinality timestamp columns
+        if self._cache is not None and len(self._cache) + len(uniques) > self.max_cache_size:
+            self._cache = None
+
+        uniques = pd.Index(uniques)
+        new_values = uniques if self._cache is None else uniques[~uniques.isin(self._cache.index)]
+
+        if len(new_values):
+            parsed = pd.Series(self._to_datetime(new_values), index=new_values)
+            self._cache = parsed if self._cache is None else pd.concat([self._cache, parsed])
+            if self.track_new:
+                self._new.append(parsed)
+
+        result = self._cache.reindex(uniques).to_numpy()[codes]
+        result[codes < 0] = np.datetime64('NaT')
+
+        return pd.Series(result, index=values.index, name=values.name)
+
+    def _to_datetime(self, values):
+        """Parse an Index of distinct values, inferring the format of those the configured one rejects"""
+        if self.date_format is None:
+            return pd.to_datetime(values).to_numpy()
+
+        parsed = pd.to_datetime(values, format=self.date_format, errors='coerce').to_numpy()
+        unmatched = np.isnat(parsed) & values.notna()
+        if unmatched.any():
+            parsed[unmatched] = pd.to_datetime(values[unmatched], format='mixed').to_numpy()
+
+        return parsed
@@ -0,0 +1,106 @@
+"""
+Per-stage memory reporting for the sales analytics pipeline
+"""
+import sqlite3
+import tracemalloc
+from contextlib import contextmanager
+from loguru import logger
+from etl.state import ensure_state_tables
+
+class MemoryReport:
+    """Records retained and peak allocated bytes for each pipeline stage
+
+    Uses tracemalloc, which sees Python objects and numpy buffers (pandas
+    columns) but not Arrow's own memory pool. Stages entered more than once,
+    such as streaming chunks, keep the largest peak and the total retained.
+    The execution mode (e.g. 'copy_on_write') labels the report so it can be
+    compared with the last run measured in another mode.
+    """
+
+    def __init__(self, enabled=True, mode='default'):
+        self.enabled = enabled
+        self.mode = mode
+        self.stages = {}
+        self._started = False
+
+    @contextmanager
+    def stage(self, name):
+        """Measure the allocations made while the block runs"""
+        if not self.enabled:
+            yield
+            return
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            stats = self.stages.setdefault(name, {'peak_bytes': 0, 'retained_bytes': 0})
+            stats['peak_bytes'] = max(stats['peak_bytes'], peak - before)
+            stats['retained_bytes'] += current - before
+
+    def stop(self):
+        """Stop tracing if this report started it"""
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def log(self, baseline=None, baseline_mode=None):
+        """Log one line per measured stage, against the baseline stages when given"""
+        for name, stats in self.stages.items():
+            line = (f"Memory [{name}] ({self.mode}): peak {stats['peak_bytes'] / 1024 ** 2:.2f} MB, "
+                    f"retained {stats['retained_bytes'] / 1024 ** 2:.2f} MB")
+
+            before = (baseline or {}).get(name)
+            if before is not None:
+                change = (stats['peak_bytes'] - before['peak_bytes']) / before['peak_bytes'] \
+                    if before['peak_bytes'] else 0.0
+                line += f" vs {baseline_mode} peak {before['peak_bytes'] / 1024 ** 2:.2f} MB ({change:+.1%})"
+
+            logger.info(line)
+
+class MemoryReportStore:
+    """Stores per-stage memory reports so runs in different execution modes can be compared"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        ensure_state_tables(conn)
+        return conn
+
+    def record(self, run_id, report):
+        """Write the stages measured by a report"""
+        conn = self._connect()
+        try:
+            conn.executemany("""
+                INSERT OR REPLACE INTO memory_reports (run_id, stage, execution_mode, peak_bytes, retained_bytes)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(run_id, name, report.mode, stats['peak_bytes'], stats['retained_bytes'])
+                  for name, stats in report.stages.items()])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_last_stages(self, mode):
+        """Return {stage: stats} of the last completed run measured in the given mode"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("""
+                SELECT m.stage, m.peak_bytes, m.retained_bytes FROM memory_reports m
+                WHERE m.run_id = (
+                    SELECT MAX(r.run_id) FROM pipeline_runs r
+                    JOIN memory_reports d ON d.run_id = r.run_id
+                    WHERE d.execution_mode = ? AND r.status = 'COMPLETED'
+                )
+            """, (mode,)).fetchall()
+        finally:
+            conn.close()
+
+        return {stage: {'peak_bytes': peak, 'retained_bytes': retained} for stage, peak, retained in rows}
@@ -0,0 +1,129 @@
+"""
+Process-pool transform executor for the sales analytics pipeline
+"""
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from pandas.api.types import union_categoricals
+import pyarrow as pa
+from loguru import logger
+
+DEFAULT_PARTITION_ROWS = 50000
+
+# Transformer shared by every task of a worker process, set by the pool initializer
+_worker_transformer = None
+
+class ParallelTransformer:
+    """Runs source transforms in worker processes over row partitions
+
+    Each source is split into contiguous row partitions; partitions of every
+    source are submitted to one process pool so small and large sources share
+    the workers. Frames cross the process boundary as Arrow IPC streams and the
+    transformed partitions are reassembled in their original row order.
+
+    The pool is started on first use and kept until close(), so the workers and
+    their transformer caches are reused by every call (e.g. every streaming
+    chunk of a run). Use the executor as a context manager to shut it down.
+    """
+
+    def __init__(self, transformer, max_workers, partition_rows=DEFAULT_PARTITION_ROWS):
+        self.transformer = transformer
+        self.max_workers = max_workers
+        self.partition_rows = max(int(partition_rows), 1)
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shut down the worker pool if it was started"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _pool(self):
+        """Return the worker pool, starting it on first use"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                                 initargs=(self.transformer,))
+        return self._executor
+
+    def should_parallelize(self, frames):
+        """Check whether the frames are large enough to be worth the pool start-up"""
+        return self.max_workers > 1 and sum(len(df) for df in frames) > self.partition_rows
+
+    def transform(self, jobs):
+        """Transform {source_name: (df, plan, outputs)} jobs and return {source_name: df}"""
+        partitions = {name: self._split(df) for name, (df, _, _) in jobs.items()}
+        total = sum(len(parts) for parts in partitions.values())
+        logger.info(f"Transforming {len(jobs)} sources in {total} partitions on {self.max_workers} workers")
+
+        executor = self._pool()
+        futures = {
+            name: [executor.submit(_transform_partition, name, to_ipc(part), jobs[name][1], jobs[name][2])
+                   for part in parts]
+            for name, parts in partitions.items()
+        }
+
+        try:
+            results = {name: [from_ipc(future.result()) for future in source_futures]
+                       for name, source_futures in futures.items()}
+        except Exception:
+            for source_futures in futures.values():
+                for future in source_futures:
+                    future.cancel()
+            raise
+
+        return {name: self._combine(parts) for name, parts in results.items()}
+
+    def _split(self, df):
+        """Split a frame into contiguous partitions of at most partition_rows rows"""
+        if len(df) <= self.partition_rows:
+            return [df]
+
+        return [df.iloc[start:start + self.partition_rows] for start in range(0, len(df), self.partition_rows)]
+
+    def _combine(self, parts):
+        """Reassemble transformed partitions in order"""
+        if len(parts) == 1:
+            return parts[0]
+
+        combined = pd.concat(parts)
+
+        # Partitions carry their own categories; union them so the columns stay categorical
+        for col in combined.columns:
+            dtypes = [part[col].dtype for part in parts]
+            if all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes) and \
+                    not isinstance(combined[col].dtype, pd.CategoricalDtype):
+                combined[col] = pd.Series(union_categoricals([part[col] for part in parts]), index=combined.index)
+
+        return combined
+
+def to_ipc(df):
+    """Serialize a frame (including its index) to an Arrow IPC stream"""
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    return sink.getvalue()
+
+def from_ipc(buffer):
+    """Deserialize a frame written by to_ipc"""
+    return pa.ipc.open_stream(buffer).read_all().to_pandas()
+
+def _init_worker(transformer):
+    global _worker_transformer
+    _worker_transformer = transformer
+
+def _transform_partition(source_name, buffer, plan, outputs):
+    """Worker entry point: transform one partition with the worker's transformer"""
+    df = from_ipc(buffer)
+    if plan is not None:
+        df = plan.execute(df, _worker_transformer)
+    else:
+        df = _worker_transformer.transform_source(source_name, df, outputs)
+
+    return to_ipc(df)
@@ -4,18 +4,68 @@ Sales Data Pipeline - Core ETL functionality
 import pandas as pd
 import sqlite3
 import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 from loguru import logger
+from etl.compaction import FrameCompactor
+from etl.memory import MemoryReport, MemoryReportStore
+from etl.parallel import DEFAULT_PARTITION_ROWS, ParallelTransformer
+from etl.plans import TransformationPlan
+from etl.profiling import ProfileStore
+from etl.pushdown import PushdownQualityExecutor
+from etl.readers import SourceReader
+from etl.state import KeyIndex, PipelineStateStore, fingerprint_files, fingerprint_matches
 from etl.transformations import DataTransformer
-from etl.quality_checks import DataQualityManager
+from etl.quality_checks import DataQualityManager, QualityGate
+
+# Columns of each target table; everything else is dropped at load time
+TABLE_COLUMNS = {
+    'sales': ['sale_id', 'product_id', 'customer_id', 'quantity', 'amount', 'sale_date'],
+    'products': ['product_id', 'product_name', 'category', 'price'],
+    'customers': ['customer_id', 'customer_name', 'email', 'region']
+}
+
+class _DeferredCommitConnection(sqlite3.Connection):
+    """SQLite connection that ignores commit() until finish()
+
+    DataFrame.to_sql commits after every write; on this connection those
+    commits are skipped so every load of a _load_transaction stays in one
+    transaction that can still be rolled back.
+    """
+
+    def commit(self):
+        pass
+
+    def finish(self):
+        """Commit the transaction"""
+        super().commit()
 
 class SalesDataPipeline:
     """Metadata-driven ETL pipeline for sales data processing"""
 
+    # Process pool shared by every transform of the current run (see _shared_transform_executor)
+    _transform_executor = None
+    # Connection shared by every load() inside _load_transaction, and the quality
+    # results logged meanwhile (written once the transaction ends)
+    _load_conn = None
+    _deferred_quality_logs = None
+    # Target tables whose rows are exactly the frame this run loaded into them (see _load_destination)
+    _exact_loads = None
+
     def __init__(self, config_path):
         self.config = self._load_config(config_path)
-        self.transformer = DataTransformer()
-        self.quality_manager = DataQualityManager()
+        settings = self.config.get('settings', {})
+        segmentation = self.config.get('customer_segmentation', {})
+        self.transformer = DataTransformer(domain_segments=segmentation.get('domain_segments'),
+                                           default_segment=segmentation.get('default_segment', 'Other'),
+                                           categorical=settings.get('categorical_dimensions', False),
+                                           date_format=settings.get('date_format'),
+                                           backend=settings.get('transform_backend', 'pandas'))
+        self.quality_manager = DataQualityManager(date_parser=self.transformer.date_parser,
+                                                  fused=settings.get('fused_quality_checks', False),
+                                                  profiling=settings.get('profiling', False))
+        self.quality_gate = self._create_quality_gate()
         self.db_path = 'sales_analytics.db'
         self.run_id = None
 
@@ -28,6 +78,18 @@ class SalesDataPipeline:
             logger.error(f"Failed to load config: {str(e)}")
             raise
 
+    def _create_quality_gate(self):
+        """Build the run's quality gate from config['quality_checks'] (None when checks are disabled)
+
+        Streaming runs announce each batch's checks only when it arrives, so their gate is unbounded.
+        """
+        quality = self.config.get('quality_checks', {})
+        if not quality.get('enabled', True):
+            return None
+
+        return QualityGate(threshold=quality.get('threshold', 0.0), fail_on_error=quality.get('fail_on_error', False),
+                           bounded=not self.config.get('settings', {}).get('streaming', False))
+
     def _start_pipeline_run(self):
         """Initialize a new pipeline run and return run_id"""
         conn = sqlite3.connect(self.db_path)
@@ -61,100 +123,442 @@ class SalesDataPipeline:
 
         logger.info(f"Completed pipeline run {self.run_id} with status: {status}")
 
-    def extract(self):
-        """Extract data from sources defined in config"""
-        extracted_data = {}
+    def extract(self, sources=None):
+        """Extract data from sources defined in config (or the given subset of them)"""
+        if sources is None:
+            sources = self.config['sources']
+        sources = [self._prepare_source(source) for source in sources]
+        workers = min(self.config.get('settings', {}).get('extract_workers', 1), len(sources))
 
-        for source in self.config['sources']:
-            logger.info(f"Extracting from source: {source['name']}")
+        if workers <= 1:
+            return {source['name']: self._extract_source(source) for source in sources}
+
+        # Sources are independent, so read them concurrently and collect in config order
+        logger.info(f"Extracting {len(sources)} sources with {workers} workers")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='extract') as executor:
+            futures = {source['name']: executor.submit(self._extract_source, source) for source in sources}
 
             try:
-                if source['type'] == 'csv':
-                    df = pd.read_csv(source['path'])
-                elif source['type'] == 'database':
-                    conn = sqlite3.connect(self.db_path)
-                    df = pd.read_sql_query(source['query'], conn)
-                    conn.close()
-                else:
-                    raise ValueError(f"Unsupported source type: {source['type']}")
-
-                extracted_data[source['name']] = df
-                logger.info(f"Extracted {len(df)} records from {source['name']}")
+                return {name: future.result() for name, future in futures.items()}
+            except Exception:
+                for future in futures.values():
+                    future.cancel()
+                raise
+
+    def _create_reader(self):
+        """Build a source reader sharing the extract worker budget"""
+        return SourceReader(self.db_path, max_workers=self.config.get('settings', {}).get('extract_workers', 1))
+
+    def _extract_source(self, source):
+        """Extract a single source into a DataFrame"""
+        logger.info(f"Extracting from source: {source['name']}")
+
+        try:
+            df = self._create_reader().read(source)
+
+            logger.info(f"Extracted {len(df)} records from {source['name']}")
+            return self._compact(source['name'], df, 'extract')
+
+        except Exception as e:
+            logger.error(f"Extraction failed for {source['name']}: {str(e)}")
+            raise
+
+    def extract_batches(self, sources=None):
+        """Yield (source_name, chunk) pairs of at most settings.batch_size rows"""
+        if sources is None:
+            sources = self.config['sources']
+        batch_size = self.config.get('settings', {}).get('batch_size', 1000)
+        reader = self._create_reader()
+
+        for source in map(self._prepare_source, sources):
+            logger.info(f"Streaming from source: {source['name']} in batches of {batch_size}")
+            total = 0
+
+            try:
+                for chunk in reader.read_batches(source, batch_size):
+                    total += len(chunk)
+                    yield source['name'], self._compact(source['name'], chunk, 'extract')
+
+                logger.info(f"Extracted {total} records from {source['name']}")
 
             except Exception as e:
                 logger.error(f"Extraction failed for {source['name']}: {str(e)}")
                 raise
 
-        return extracted_data
+    def _detect_changed_sources(self):
+        """Fingerprint file sources and drop those unchanged since the last completed run
+
+        Returns the sources still to process and the fingerprints to record on success.
+        """
+        state = PipelineStateStore(self.db_path)
+        reader = self._create_reader()
+        sources = []
+        fingerprints = {}
+
+        for source in self.config['sources']:
+            if 'path' not in source:
+                sources.append(source)
+                continue
+
+            previous = state.get_last_fingerprint(source['name'])
+            files = [path for path, _ in reader.resolve_files(source)]
+            fingerprint = fingerprint_files(source['path'], files, previous)
+
+            if fingerprint_matches(fingerprint, previous):
+                logger.info(f"Skipping unchanged source: {source['name']} ({fingerprint['content_hash'][:12]})")
+                continue
+
+            sources.append(source)
+            fingerprints[source['name']] = fingerprint
+
+        return sources, fingerprints
+
+    def _prepare_source(self, source):
+        """Apply column pruning and watermark filtering to a source before reading it"""
+        return self._apply_watermark(self._project_source(source))
+
+    def _apply_watermark(self, source):
+        """Restrict a database source to rows above its persisted high-water mark"""
+        column = source.get('watermark_column')
+        if source['type'] != 'database' or not column:
+            return source
+
+        high_water_mark = PipelineStateStore(self.db_path).get_watermark(source['name'], column)
+        if high_water_mark is None:
+            logger.info(f"No watermark for {source['name']} yet, extracting all rows")
+            return source
+
+        logger.info(f"Extracting {source['name']} rows with {column} > {high_water_mark}")
+        query = f"SELECT * FROM ({source['query']}) AS src WHERE {column} > ? ORDER BY {column}"
+        return {**source, 'query': query, 'params': (high_water_mark,)}
+
+    def _track_watermarks(self, source_name, df, watermarks):
+        """Raise the pending high-water mark of a source to the max value extracted"""
+        source = next((s for s in self.config['sources'] if s['name'] == source_name), {})
+        column = source.get('watermark_column')
+        if source.get('type') != 'database' or not column or df.empty:
+            return
+
+        value = df[column].max()
+        if pd.isna(value):
+            return
+
+        # Store plain Python values so SQLite compares them with the column's own type
+        value = value.item() if hasattr(value, 'item') else str(value)
+        if source_name not in watermarks or value > watermarks[source_name][1]:
+            watermarks[source_name] = (column, value)
+
+    def _project_source(self, source):
+        """Attach the column projection a source needs when settings.prune_columns is on"""
+        if not self.config.get('settings', {}).get('prune_columns') or source.get('columns') is not None:
+            return source
+
+        columns = self._required_columns(source['name'])
+        if columns is None:
+            return source
+
+        logger.info(f"Pruning {source['name']} to columns: {columns}")
+        return {**source, 'columns': columns}
+
+    def _required_columns(self, source_name):
+        """Columns of a source read by its destinations, transform and quality rules"""
+        columns = self._consumed_columns(source_name)
+        if columns is None:
+            return None
+
+        spec = self.config.get('transformations', {}).get(source_name)
+        if spec is not None:
+            columns.extend(TransformationPlan.compile(source_name, spec, self._plan_outputs(source_name)).input_columns)
+        else:
+            columns.extend(self.transformer.get_input_columns(source_name))
+
+        return list(dict.fromkeys(columns))
+
+    def _consumed_columns(self, source_name):
+        """Columns of a transformed source read by its destinations, quality rules and the fact builder"""
+        tables = [d['table'] for d in self.config['destinations'] if d['source'] == source_name]
+
+        # Without a known target table every column may end up loaded
+        if not tables or any(table not in TABLE_COLUMNS for table in tables):
+            return None
+
+        columns = []
+        for table in tables:
+            columns.extend(TABLE_COLUMNS[table])
+        columns.extend(self.quality_manager.get_rule_columns(source_name))
+        columns.extend(self.transformer.get_fact_columns(source_name))
+
+        return list(dict.fromkeys(columns))
+
+    def _plan_outputs(self, source_name):
+        """Columns a plan must produce; None (every column) unless settings.prune_derived_columns is on
+
+        Plans prune dead steps under the same setting the built-in transforms use,
+        so both paths produce the same columns for a given config.
+        """
+        if not self.config.get('settings', {}).get('prune_derived_columns'):
+            return None
+
+        return self._consumed_columns(source_name)
+
+    def _compile_plans(self):
+        """Compile the declarative transformation plans once per run"""
+        plans = {}
+        for source_name, spec in self.config.get('transformations', {}).items():
+            plan = TransformationPlan.compile(source_name, spec, self._plan_outputs(source_name))
+            logger.info(f"Compiled transformation plan for {source_name}: "
+                        f"{len(plan.steps)} of {plan.declared_steps} steps after fusion and dead-step removal")
+            plans[source_name] = plan
+
+        return plans
 
     def transform(self, extracted_data):
         """Apply transformations to extracted data"""
         transformed_data = {}
+        plans = self._compile_plans()
+        self._expect_checks(extracted_data)
+
+        # Large inputs are transformed in worker processes, then quality-checked here
+        with self._shared_transform_executor() as executor:
+            if executor is not None and executor.should_parallelize(extracted_data.values()):
+                jobs = {name: self._transform_job(name, df, plans) for name, df in extracted_data.items()}
+                for source_name, df in executor.transform(jobs).items():
+                    transformed_data[source_name] = self._check_source(source_name, df)
+                return transformed_data
 
         for source_name, df in extracted_data.items():
-            logger.info(f"Transforming data from: {source_name}")
+            transformed_data[source_name] = self._transform_source(source_name, df, plans)
 
-            # Apply specific transformations based on source
-            if source_name == 'sales':
-                df = self.transformer.transform_sales_data(df)
-            elif source_name == 'products':
-                df = self.transformer.transform_product_data(df)
-            elif source_name == 'customers':
-                df = self.transformer.transform_customer_data(df)
+        return transformed_data
 
+    def _expect_checks(self, data):
+        """Announce to the quality gate the checks data will run before it is loaded"""
+        if self.quality_gate is None:
+            return
+
+        for source_name in data:
+            self.quality_gate.expect(len(self.quality_manager.get_check_types(source_name))
+                                     + (1 if self._uses_key_index(source_name) else 0))
+
+    def _create_transform_executor(self):
+        """Build the process-pool transform executor, or None when transform_workers <= 1"""
+        settings = self.config.get('settings', {})
+        workers = settings.get('transform_workers', 1)
+        if workers <= 1:
+            return None
+
+        return ParallelTransformer(self.transformer, workers,
+                                   settings.get('transform_partition_rows', DEFAULT_PARTITION_ROWS))
+
+    @contextmanager
+    def _shared_transform_executor(self):
+        """Yield the run's transform executor, or start one for this call when no run is active
+
+        run() enters this once, so every transform and streaming chunk of the
+        run reuses one worker pool, which is shut down when the run ends.
+        """
+        if self._transform_executor is not None:
+            yield self._transform_executor
+            return
+
+        with self._create_transform_executor() or nullcontext() as executor:
+            self._transform_executor = executor
+            try:
+                yield executor
+            finally:
+                self._transform_executor = None
+
+    def _transform_job(self, source_name, df, plans=None):
+        """Return the (df, plan, outputs) triple describing how a source is transformed"""
+        # Declarative plans take precedence over the built-in transforms
+        plan = plans.get(source_name) if plans else None
+        outputs = None
+        if plan is None and self.config.get('settings', {}).get('prune_derived_columns'):
+            # Only materialize derived columns a destination, quality rule or the fact builder reads
+            outputs = self.transformer.get_derived_columns(source_name, self._consumed_columns(source_name))
+
+        return df, plan, outputs
+
+    def _transform_source(self, source_name, df, plans=None, executor=None):
+        """Transform and quality-check a single source (or chunk of a source)"""
+        logger.info(f"Transforming data from: {source_name}")
+        df, plan, outputs = self._transform_job(source_name, df, plans)
+
+        if executor is not None and executor.should_parallelize([df]):
+            df = executor.transform({source_name: (df, plan, outputs)})[source_name]
+        elif plan is not None:
+            df = plan.execute(df, self.transformer)
+        else:
+            df = self.transformer.transform_source(source_name, df, outputs)
+
+        return self._check_source(source_name, df)
+
+    def _check_source(self, source_name, df):
+        """Run the quality checks for a transformed source"""
+        gate = self.quality_gate
+        if gate is None:
+            # Validation is disabled; profiles are still collected when profiling is on
+            if self.quality_manager.profiling:
+                self.quality_manager.profile_data(df, source_name)
+        else:
             # Apply data quality checks
-            quality_results = self.quality_manager.validate_data(df, source_name)
+            quality_results = self.quality_manager.validate_data(df, source_name, gate)
+            if self._uses_key_index(source_name) and not gate.should_stop():
+                quality_results['unique_across_runs'] = self._check_key_index(source_name, df)
+                gate.record(source_name, 'unique_across_runs', quality_results['unique_across_runs']['passed'])
             self._log_quality_results(quality_results, source_name)
 
-            transformed_data[source_name] = df
-            logger.info(f"Transformed {len(df)} records for {source_name}")
-
-        return transformed_data
+            # Fail fast: later sources are neither transformed nor checked once the threshold is out of reach
+            gate.check_reachable()
+
+        logger.info(f"Transformed {len(df)} records for {source_name}")
+        return self._compact(source_name, df, 'transform')
+
+    def _uses_key_index(self, source_name):
+        """Check whether a source has columns checked against the cross-run key index"""
+        return len(self._key_index_columns(source_name)) > 0
+
+    def _key_index_columns(self, source_name):
+        """Unique-rule columns of a source checked against the cross-run key index
+
+        Upsert destinations reload their merge key on purpose, so that column is
+        exempt; their other unique columns (e.g. customers.email) are indexed
+        with the merge key owning each value, see _key_index_owner.
+        """
+        if not self.config.get('settings', {}).get('key_index'):
+            return []
+
+        owner = self._key_index_owner(source_name)
+        columns = self.quality_manager.rules.get(source_name, {}).get('unique_columns', [])
+        return [col for col in columns if col != owner]
+
+    def _key_index_owner(self, source_name):
+        """Merge key shared by every destination of a source, or None when any of them appends"""
+        merge_keys = {d.get('merge_key') for d in self.config['destinations'] if d['source'] == source_name}
+        return merge_keys.pop() if len(merge_keys) == 1 else None
+
+    def _key_index_owners(self, source_name, df):
+        """The owning merge key of each row, or None to flag every value loaded before"""
+        owner = self._key_index_owner(source_name)
+        return df[owner] if owner in df.columns else None
+
+    def _check_key_index(self, source_name, df):
+        """Count rows whose unique-column values were already loaded by an earlier batch or run
+
+        For upsert sources a value only counts when it was loaded under another merge key.
+        """
+        index = KeyIndex(self.db_path)
+        owners = self._key_index_owners(source_name, df)
+        duplicates = {}
+
+        for col in self._key_index_columns(source_name):
+            if col not in df.columns:
+                continue
+            existing = index.find_existing(source_name, col, df[col], conn=self._load_conn, owners=owners)
+            count = int(df[col].isin(existing).sum()) if existing else 0
+            if count > 0:
+                duplicates[col] = count
+
+        return {
+            'passed': len(duplicates) == 0,
+            'details': {
+                'duplicate_counts': duplicates
+            }
+        }
+
+    def _compact(self, source_name, df, stage):
+        """Compact a stage's output when settings.compaction is on
+
+        After transform, constant columns nothing downstream reads (such as
+        transformed_at) are moved into df.attrs['constants'].
+        """
+        settings = self.config.get('settings', {})
+        if not settings.get('compaction'):
+            return df
+
+        compactor = FrameCompactor(exclude=settings.get('compaction_exclude'),
+                                   report=settings.get('memory_report', False))
+        if stage != 'transform':
+            return compactor.compact(df, f"{source_name} after {stage}")
+
+        consumed = self._consumed_columns(source_name)
+        return compactor.compact(df, f"{source_name} after {stage}", fold_constants=consumed is not None,
+                                 keep=consumed or ())
 
     def load(self, transformed_data):
         """Load transformed data to destination"""
         total_records = 0
-        conn = sqlite3.connect(self.db_path)
+        # Inside _load_transaction the shared connection commits once for every load
+        shared = self._load_conn is not None
+        conn = self._load_conn if shared else sqlite3.connect(self.db_path)
 
         try:
             for destination in self.config['destinations']:
                 source_name = destination['source']
-                table_name = destination['table']
 
                 if source_name in transformed_data:
-                    df = transformed_data[source_name].copy()
+                    total_records += self._load_destination(conn, destination, transformed_data[source_name])
 
-                    # Select only the columns that exist in the target table
-                    if table_name == 'sales':
-                        df = df[['sale_id', 'product_id', 'customer_id', 'quantity', 'amount', 'sale_date']]
-                    elif table_name == 'products':
-                        df = df[['product_id', 'product_name', 'category', 'price']]
-                    elif table_name == 'customers':
-                        df = df[['customer_id', 'customer_name', 'email', 'region']]
-
-                    # Load to staging table first
-                    df.to_sql(f'stg_{table_name}', conn, if_exists='replace', index=False)
-
-                    # Perform merge/upsert operation (simplified for SQLite)
-                    if destination.get('merge_key'):
-                        self._merge_data(conn, table_name, destination['merge_key'])
-                    else:
-                        df.to_sql(table_name, conn, if_exists='append', index=False)
-
-                    total_records += len(df)
-                    logger.info(f"Loaded {len(df)} records to {table_name}")
-
-            conn.commit()
+            if not shared:
+                conn.commit()
 
         except Exception as e:
-            conn.rollback()
+            if not shared:
+                conn.rollback()
             logger.error(f"Load failed: {str(e)}")
             raise
         finally:
-            conn.close()
+            if not shared:
+                conn.close()
 
         return total_records
 
+    def _load_destination(self, conn, destination, df):
+        """Stage and merge a transformed frame into one destination table"""
+        table_name = destination['table']
+
+        # Select only the columns that exist in the target table (the load never mutates df)
+        if table_name in TABLE_COLUMNS:
+            df = df[TABLE_COLUMNS[table_name]]
+
+        # The table holds exactly df after the load when it was empty and no row of df replaces another
+        merge_key = destination.get('merge_key')
+        exact = self._is_empty(conn, table_name) and (not merge_key or not df[merge_key].duplicated().any())
+
+        # Load to staging table first
+        df.to_sql(f'stg_{table_name}', conn, if_exists='replace', index=False)
+
+        # Perform merge/upsert operation (simplified for SQLite)
+        if merge_key:
+            self._merge_data(conn, table_name, merge_key)
+        else:
+            df.to_sql(table_name, conn, if_exists='append', index=False)
+
+        # Register loaded keys in the same transaction so later batches and runs see them
+        source_name = destination['source']
+        if self._uses_key_index(source_name):
+            index = KeyIndex(self.db_path)
+            owners = self._key_index_owners(source_name, df)
+            for col in self._key_index_columns(source_name):
+                if col in df.columns:
+                    index.register(conn, source_name, col, df[col], self.run_id, owners=owners)
+
+        if self._exact_loads is not None:
+            if exact:
+                self._exact_loads.add(table_name)
+            else:
+                self._exact_loads.discard(table_name)
+
+        logger.info(f"Loaded {len(df)} records to {table_name}")
+        return len(df)
+
+    def _is_empty(self, conn, table_name):
+        """Check whether a table is missing or has no rows, without scanning it"""
+        try:
+            return conn.execute(f"SELECT 1 FROM {table_name} LIMIT 1").fetchone() is None
+        except sqlite3.OperationalError:
+            return True
+
     def _merge_data(self, conn, table_name, merge_key):
         """Merge data from staging to target table"""
         cursor = conn.cursor()
@@ -171,8 +575,34 @@ class SalesDataPipeline:
             SELECT {columns_str} FROM stg_{table_name}
         """)
 
+    @contextmanager
+    def _load_transaction(self):
+        """Commit every load() made inside the block together, or roll them all back"""
+        conn = sqlite3.connect(self.db_path, factory=_DeferredCommitConnection)
+        self._load_conn, self._deferred_quality_logs = conn, []
+
+        try:
+            # Begin explicitly so table drops and creates are part of the transaction too
+            conn.execute("BEGIN")
+            yield conn
+            conn.finish()
+        except Exception:
+            conn.rollback()
+            logger.warning("Rolled back every batch loaded so far")
+            raise
+        finally:
+            conn.close()
+            deferred, self._load_conn, self._deferred_quality_logs = self._deferred_quality_logs, None, None
+            for results, table_name in deferred:
+                self._log_quality_results(results, table_name)
+
     def _log_quality_results(self, results, table_name):
         """Log data quality check results"""
+        # SQLite allows one writer, so results wait for an open load transaction
+        if self._deferred_quality_logs is not None:
+            self._deferred_quality_logs.append((results, table_name))
+            return
+
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
@@ -185,19 +615,45 @@ class SalesDataPipeline:
         conn.commit()
         conn.close()
 
+    def _run_streaming(self, sources=None, watermarks=None):
+        """Extract, transform and load one batch at a time to keep memory flat
+
+        With quality_checks.fail_on_error every batch is loaded in one
+        transaction, so when the quality gate stops the run at a later batch
+        the batches loaded before it are rolled back. (Gating every batch
+        before the first load would need the whole input in memory.)
+        """
+        records_processed = 0
+        plans = self._compile_plans()
+        atomic = self.quality_gate is not None and self.quality_gate.fail_on_error
+
+        with self._shared_transform_executor() as executor, \
+                self._load_transaction() if atomic else nullcontext():
+            for source_name, chunk in self.extract_batches(sources):
+                if watermarks is not None:
+                    self._track_watermarks(source_name, chunk, watermarks)
+                self._expect_checks([source_name])
+                chunk = self._transform_source(source_name, chunk, plans, executor)
+                self._enforce_quality_gate()
+                records_processed += self.load({source_name: chunk})
+                self._persist_parsed_dates()
+
+        return records_processed
+
     def run(self):
         """Execute the complete ETL pipeline"""
         try:
             self._start_pipeline_run()
+            settings = self.config.get('settings', {})
 
-            # Extract
-            extracted_data = self.extract()
-
-            # Transform
-            transformed_data = self.transform(extracted_data)
-
-            # Load
-            records_processed = self.load(transformed_data)
+            memory = MemoryReport(enabled=settings.get('memory_report', False),
+                                  mode='copy_on_write' if settings.get('copy_on_write') else 'default')
+            try:
+                with self._execution_mode(settings), self._shared_transform_executor():
+                    records_processed = self._execute(settings, memory)
+            finally:
+                memory.stop()
+                self._report_memory(memory)
 
             self._end_pipeline_run('COMPLETED', records_processed)
 
@@ -206,4 +662,142 @@ class SalesDataPipeline:
         except Exception as e:
             logger.error(f"Pipeline failed: {str(e)}")
             self._end_pipeline_run('FAILED', 0, str(e))
-            return False
\ No newline at end of file
+            return False
+
+    def _report_memory(self, memory):
+        """Log this run's memory report next to the last run measured in the other execution mode"""
+        if not memory.stages:
+            return
+
+        store = MemoryReportStore(self.db_path)
+        baseline_mode = 'default' if memory.mode == 'copy_on_write' else 'copy_on_write'
+        memory.log(store.get_last_stages(baseline_mode), baseline_mode)
+        store.record(self.run_id, memory)
+
+    def _execution_mode(self, settings):
+        """Scope pandas copy-on-write to the run when settings.copy_on_write is on"""
+        if settings.get('copy_on_write'):
+            return pd.option_context('mode.copy_on_write', True)
+
+        return nullcontext()
+
+    def _execute(self, settings, memory):
+        """Run the extract, transform and load stages and persist run state"""
+        # Skip file sources whose fingerprint matches the last completed run
+        sources, fingerprints = None, {}
+        if settings.get('incremental'):
+            sources, fingerprints = self._detect_changed_sources()
+
+        # High-water marks reached by watermarked database sources
+        watermarks = {}
+        self.quality_manager.reset_profiles()
+        date_parser = self.transformer.date_parser
+        # Newly parsed strings are only kept (until the next batch is persisted) when they are persisted
+        date_parser.track_new = bool(settings.get('persist_date_cache'))
+        date_parser.drain_new()
+        if settings.get('persist_date_cache'):
+            # Strings parsed by earlier runs are not parsed again
+            date_parser.seed(PipelineStateStore(self.db_path).get_parsed_dates(date_parser.date_format,
+                                                                               date_parser.max_cache_size))
+        self.quality_gate = self._create_quality_gate()
+        # Only a batch run keeps the transformed frames after the load
+        transformed_data = None
+        self._exact_loads = set()
+
+        if settings.get('streaming'):
+            # Extract, transform and load batch by batch
+            with memory.stage('streaming'):
+                records_processed = self._run_streaming(sources, watermarks)
+        else:
+            # Extract
+            with memory.stage('extract'):
+                extracted_data = self.extract(sources)
+            for source_name, df in extracted_data.items():
+                self._track_watermarks(source_name, df, watermarks)
+
+            # Transform (takes ownership of the extracted frames)
+            with memory.stage('transform'):
+                transformed_data = self.transform(extracted_data)
+            self._enforce_quality_gate()
+
+            # Load
+            with memory.stage('load'):
+                records_processed = self.load(transformed_data)
+
+        # Validate the loaded target tables in the database, without reading them back
+        if settings.get('post_load_checks'):
+            with memory.stage('post_load_checks'):
+                self._check_loaded_tables(transformed_data)
+
+        if fingerprints:
+            PipelineStateStore(self.db_path).record_fingerprints(self.run_id, fingerprints)
+        if watermarks:
+            PipelineStateStore(self.db_path).record_watermarks(self.run_id, watermarks)
+        self._persist_parsed_dates()
+        if self.quality_manager.profiles:
+            self._record_profiles(settings.get('drift_threshold', 0.2))
+
+        return records_processed
+
+    def _persist_parsed_dates(self):
+        """Persist the date strings parsed since the last call (settings.persist_date_cache)"""
+        date_parser = self.transformer.date_parser
+        if date_parser.track_new:
+            PipelineStateStore(self.db_path).record_parsed_dates(date_parser.date_format, date_parser.drain_new(),
+                                                                 date_parser.max_cache_size, conn=self._load_conn)
+
+    def _check_loaded_tables(self, transformed_data=None):
+        """Run each destination's quality rules against its target table
+
+        A table this run filled from empty with a frame still in memory (see
+        _load_destination) is checked in pandas; any other table, such as an
+        append or upsert target with earlier rows, in SQL.
+        """
+        executor = PushdownQualityExecutor(self.quality_manager)
+        conn = sqlite3.connect(self.db_path)
+
+        try:
+            checked = set()
+            for destination in self.config['destinations']:
+                table_name = destination['table']
+                if table_name in checked:
+                    continue
+                checked.add(table_name)
+
+                df = (transformed_data or {}).get(destination['source']) if table_name in (self._exact_loads or ()) else None
+                if df is not None and table_name in TABLE_COLUMNS:
+                    df = df[TABLE_COLUMNS[table_name]]
+
+                results = executor.validate(destination['source'], df=df, conn=conn, relation=table_name)
+                failed = [check_type for check_type, result in results.items() if not result['passed']]
+                if failed:
+                    logger.warning(f"Post-load quality checks failed for {table_name}: {', '.join(failed)}")
+                self._log_quality_results({f"post_load_{check_type}": result for check_type, result in results.items()},
+                                          table_name)
+        finally:
+            conn.close()
+
+    def _enforce_quality_gate(self):
+        """Check the quality pass ratio before loading (raises with quality_checks.fail_on_error)"""
+        if self.quality_gate is not None:
+            self.quality_gate.enforce()
+
+    def _record_profiles(self, drift_threshold):
+        """Persist this run's table profiles and log drift against the last completed run"""
+        store = ProfileStore(self.db_path)
+
+        for table_name, profile in self.quality_manager.profiles.items():
+            previous = store.get_last_profile(table_name)
+            store.record(self.run_id, table_name, profile)
+            if previous is None:
+                continue
+
+            scores = profile.drift(previous)
+            drifted = {col: round(score, 4) for col, score in scores.items() if score > drift_threshold}
+            if drifted:
+                logger.warning(f"Distribution drift in {table_name}: {drifted}")
+
+            self._log_quality_results({'distribution_drift': {
+                'passed': len(drifted) == 0,
+                'details': {'drifted_columns': drifted, 'threshold': drift_threshold}
+            }}, table_name)
@@ -0,0 +1,182 @@
+"""
+Declarative transformation plans for the sales analytics pipeline
+"""
+from datetime import datetime
+from etl.dates import DateParser
+
+PLAN_OPERATIONS = ['derive', 'cast', 'standardize', 'bucket', 'fill']
+
+# Derive functions served by the transformer's calendar cache
+CALENDAR_FUNCTIONS = ['year', 'quarter', 'month', 'day', 'day_of_week', 'is_weekend', 'date_key']
+
+DERIVE_FUNCTIONS = CALENDAR_FUNCTIONS + ['divide', 'split_part', 'segment', 'now']
+
+class TransformationPlan:
+    """A compiled transformation plan for one source
+
+    Plans are compiled from the "transformations" section of the pipeline
+    config. Compilation expands multi-column steps, drops steps whose outputs
+    nothing downstream reads, and fuses calendar derives on the same date
+    column into a single lookup. Execution keeps intermediate columns in a
+    local map and writes each consumed column back to the frame once.
+    """
+
+    def __init__(self, source_name, steps, declared_steps=None, required_columns=None):
+        self.source_name = source_name
+        self.steps = steps
+        self.declared_steps = declared_steps if declared_steps is not None else len(steps)
+        self.required_columns = set(required_columns) if required_columns is not None else None
+
+    @classmethod
+    def compile(cls, source_name, spec, required_columns=None):
+        """Compile a list of step specs, keeping only steps that feed required_columns"""
+        steps = [step for item in spec for step in cls._normalize_step(item)]
+        total = len(steps)
+
+        if required_columns is not None:
+            steps = cls._eliminate_dead_steps(steps, required_columns)
+
+        steps = cls._fuse_calendar_steps(steps)
+        return cls(source_name, steps, total, required_columns)
+
+    @property
+    def input_columns(self):
+        """Source columns the plan reads before producing them itself"""
+        produced = set()
+        inputs = []
+        for step in self.steps:
+            inputs.extend(col for col in step['inputs'] if col not in produced and col not in inputs)
+            produced.update(step['outputs'])
+
+        return inputs
+
+    @staticmethod
+    def _normalize_step(item):
+        """Expand a step spec into single-output steps with explicit inputs and outputs"""
+        op = item.get('op')
+        if op not in PLAN_OPERATIONS:
+            raise ValueError(f"Unsupported transformation op: {op}")
+
+        if op in ('cast', 'standardize', 'fill'):
+            columns = item.get('columns') or [item['column']]
+            return [{**item, 'inputs': [col], 'outputs': [col]} for col in columns]
+
+        if op == 'derive' and item.get('function') not in DERIVE_FUNCTIONS:
+            raise ValueError(f"Unsupported derive function: {item.get('function')}")
+
+        inputs = item.get('inputs') or ([item['input']] if 'input' in item else [])
+        return [{**item, 'inputs': inputs, 'outputs': [item['column']]}]
+
+    @staticmethod
+    def _eliminate_dead_steps(steps, required_columns):
+        """Walk the plan backwards and keep only steps whose outputs are still read"""
+        live = set(required_columns)
+        kept = []
+
+        for step in reversed(steps):
+            if not live.intersection(step['outputs']):
+                continue
+
+            kept.append(step)
+            # Columns produced from scratch are not needed before this step
+            live.difference_update(col for col in step['outputs'] if col not in step['inputs'])
+            live.update(step['inputs'])
+
+        return kept[::-1]
+
+    @staticmethod
+    def _fuse_calendar_steps(steps):
+        """Merge consecutive calendar derives over the same column into one lookup step"""
+        fused = []
+        for step in steps:
+            if step['op'] == 'derive' and step['function'] in CALENDAR_FUNCTIONS:
+                previous = fused[-1] if fused else None
+                if previous and previous['op'] == 'calendar' and previous['inputs'] == step['inputs']:
+                    previous['features'][step['column']] = step['function']
+                    previous['outputs'].append(step['column'])
+                    continue
+
+                fused.append({'op': 'calendar', 'inputs': step['inputs'], 'outputs': [step['column']],
+                              'features': {step['column']: step['function']}})
+            else:
+                fused.append(step)
+
+        return fused
+
+    def execute(self, df, transformer):
+        """Run the plan against a frame using the transformer's column primitives"""
+        values = {}
+
+        def column(name):
+            return values[name] if name in values else df[name]
+
+        for step in self.steps:
+            op = step['op']
+
+            if op == 'calendar':
+                features = transformer.calendar.features(column(step['inputs'][0]),
+                                                         list(dict.fromkeys(step['features'].values())))
+                for output, feature in step['features'].items():
+                    values[output] = features[feature]
+                continue
+
+            output = step['outputs'][0]
+            if op == 'cast':
+                values[output] = self._cast(column(output), step, transformer)
+            elif op == 'standardize':
+                # As in the built-in transforms, only dimension columns take the categorical path
+                standardize = transformer._standardize_text if output in transformer.CATEGORICAL_COLUMNS \
+                    else transformer.backend.standardize_text
+                values[output] = standardize(column(output), step.get('case', 'lower'))
+            elif op == 'fill':
+                values[output] = transformer._fill_missing(column(output), step['value'])
+            elif op == 'bucket':
+                bins = [float(edge) if isinstance(edge, str) else edge for edge in step['bins']]
+                values[output] = transformer.backend.bucket(column(step['inputs'][0]), bins, step.get('labels'))
+            elif op == 'derive':
+                values[output] = self._derive(step, column, transformer)
+
+        # Each consumed column is written to the frame exactly once; pure intermediates never are
+        for col, value in values.items():
+            if self.required_columns is None or col in self.required_columns:
+                df[col] = value
+
+        return transformer._categorize_columns(df)
+
+    def _cast(self, series, step, transformer):
+        """Convert a column's type and/or round it"""
+        target = step.get('type')
+        if target in ('date', 'datetime'):
+            date_format = step.get('format')
+            parser = transformer.date_parser
+            if date_format is not None and date_format != parser.date_format:
+                parser = DateParser(date_format)
+            series = parser.parse(series)
+        elif target is not None:
+            series = series.astype(target)
+
+        if step.get('round') is not None:
+            series = series.round(step['round'])
+
+        return series
+
+    def _derive(self, step, column, transformer):
+        """Compute a derived column from its inputs"""
+        function = step['function']
+        inputs = [column(name) for name in step['inputs']]
+
+        if function == 'divide':
+            result = inputs[0] / inputs[1]
+        elif function == 'split_part':
+            result = transformer.backend.split_part(inputs[0], step.get('separator', ' '), step.get('index', 0))
+        elif function == 'segment':
+            result = transformer._segment_customers(inputs[0])
+        elif function == 'now':
+            return datetime.now()
+        else:
+            result = transformer.calendar.features(inputs[0], [function])[function]
+
+        if step.get('round') is not None:
+            result = result.round(step['round'])
+
+        return result
@@ -0,0 +1,309 @@
+"""
+Mergeable column profiles for the sales analytics pipeline
+"""
+import base64
+import json
+import sqlite3
+import numpy as np
+import pandas as pd
+from etl.state import ensure_state_tables
+
+HLL_PRECISION = 12
+DIGEST_COMPRESSION = 200
+TOP_K_CAPACITY = 32
+REPORTED_QUANTILES = [0.01, 0.25, 0.5, 0.75, 0.99]
+
+class ColumnProfile:
+    """Mergeable sketches of one column
+
+    Keeps the row and null counts, min/max, a HyperLogLog register array for
+    distinct counts, a merging t-digest for quantiles (numeric and datetime
+    columns) and Misra-Gries counters for the most frequent values. Every
+    sketch has a fixed size and merges exactly like its inputs were one stream,
+    so chunks and parallel workers can be profiled independently.
+    """
+
+    def __init__(self, kind='other'):
+        self.kind = kind
+        self.count = 0
+        self.nulls = 0
+        self.min = None
+        self.max = None
+        self.registers = np.zeros(1 << HLL_PRECISION, dtype=np.uint8)
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.top = {}
+
+    @classmethod
+    def from_series(cls, series):
+        """Profile one chunk of a column"""
+        kind = 'datetime' if pd.api.types.is_datetime64_any_dtype(series) else \
+            'numeric' if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series) else 'other'
+        profile = cls(kind)
+        values = series.dropna()
+        profile.count = len(series)
+        profile.nulls = len(series) - len(values)
+
+        if len(values):
+            profile.registers = _hll_registers(pd.util.hash_pandas_object(values, index=False).to_numpy())
+            profile.top = _top_values(values.value_counts(), TOP_K_CAPACITY)
+
+            if kind != 'other':
+                numbers = np.sort(values.to_numpy().astype('int64' if kind == 'datetime' else 'float64'))
+                profile.min, profile.max = numbers[0].item(), numbers[-1].item()
+                profile.means, profile.weights = _compress(numbers.astype('float64'), np.ones(len(numbers)))
+
+        return profile
+
+    def merge(self, other):
+        """Fold another profile of the same column into this one"""
+        self.count += other.count
+        self.nulls += other.nulls
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        np.maximum(self.registers, other.registers, out=self.registers)
+        if len(other.weights):
+            self.means, self.weights = _compress(np.concatenate([self.means, other.means]),
+                                                 np.concatenate([self.weights, other.weights]))
+        merged = dict(self.top)
+        for value, count in other.top.items():
+            merged[value] = merged.get(value, 0) + count
+        self.top = _top_values(pd.Series(merged, dtype='int64'), TOP_K_CAPACITY) if merged else {}
+
+        return self
+
+    def distinct_estimate(self):
+        """HyperLogLog estimate of the number of distinct non-null values"""
+        m = len(self.registers)
+        if not self.registers.any():
+            return 0
+
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while most registers are empty
+            estimate = m * np.log(m / zeros)
+
+        return int(round(estimate))
+
+    def quantiles(self, qs=REPORTED_QUANTILES):
+        """Approximate quantiles from the t-digest (None for non-numeric columns)"""
+        if not len(self.weights):
+            return None
+
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        values = np.interp(np.asarray(qs) * total, np.r_[0, centers, total], np.r_[self.min, self.means, self.max])
+        return [self._display(value) for value in values]
+
+    def cdf(self, points):
+        """Approximate fraction of non-null values at or below each point"""
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return np.interp(points, np.r_[self.min, self.means, self.max], np.r_[0, centers, total] / total)
+
+    def top_values(self, k=10):
+        """Most frequent values with their (lower-bound) counts"""
+        return sorted(self.top.items(), key=lambda item: -item[1])[:k]
+
+    def drift(self, previous):
+        """Distribution distance from an earlier profile of the column, between 0 and 1
+
+        Numeric and datetime columns use the Kolmogorov-Smirnov distance of the
+        two digests; other columns the total variation distance of their
+        top-value shares. Null-rate changes count as drift as well.
+        """
+        null_shift = abs(self.nulls / max(self.count, 1) - previous.nulls / max(previous.count, 1))
+
+        if self.kind != 'other' and previous.kind == self.kind and len(self.weights) and len(previous.weights):
+            points = np.union1d(self.means, previous.means)
+            distance = float(np.max(np.abs(self.cdf(points) - previous.cdf(points))))
+        else:
+            distance = _share_distance(self, previous)
+
+        return max(distance, null_shift)
+
+    def summary(self):
+        """Column statistics for reports and the data_profiles table"""
+        return {
+            'row_count': self.count,
+            'null_count': self.nulls,
+            'distinct_estimate': self.distinct_estimate(),
+            'min_value': self._display(self.min),
+            'max_value': self._display(self.max),
+            'quantiles': self.quantiles(),
+            'top_values': [[str(value), count] for value, count in self.top_values()]
+        }
+
+    def to_dict(self):
+        """Serialize every sketch so later runs can merge or compare against it"""
+        return {
+            'kind': self.kind,
+            'count': self.count,
+            'nulls': self.nulls,
+            'min': self.min,
+            'max': self.max,
+            'registers': base64.b64encode(self.registers.tobytes()).decode('ascii'),
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+            'top': [[str(value), count] for value, count in self.top.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a profile written by to_dict (top values come back as strings)"""
+        profile = cls(data['kind'])
+        profile.count, profile.nulls = data['count'], data['nulls']
+        profile.min, profile.max = data['min'], data['max']
+        profile.registers = np.frombuffer(base64.b64decode(data['registers']), dtype=np.uint8).copy()
+        profile.means = np.asarray(data['means'], dtype='float64')
+        profile.weights = np.asarray(data['weights'], dtype='float64')
+        profile.top = {value: count for value, count in data['top']}
+        return profile
+
+    def _display(self, value):
+        if value is None:
+            return None
+        if self.kind == 'datetime':
+            return str(pd.Timestamp(int(value)))
+        return float(value)
+
+class DataProfile:
+    """Column profiles of one table, merged chunk by chunk"""
+
+    def __init__(self, columns=None):
+        self.columns = columns or {}
+
+    def update(self, df, columns=None):
+        """Profile a chunk (optionally only some columns) and merge it into the table profile"""
+        for col in (df.columns if columns is None else columns):
+            chunk = ColumnProfile.from_series(df[col])
+            if col in self.columns:
+                self.columns[col].merge(chunk)
+            else:
+                self.columns[col] = chunk
+
+        return self
+
+    def merge(self, other):
+        """Fold another profile of the same table (e.g. from a worker) into this one"""
+        for col, profile in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(profile)
+            else:
+                self.columns[col] = profile
+
+        return self
+
+    def drift(self, previous):
+        """Drift score of every column also present in the previous profile"""
+        return {col: profile.drift(previous.columns[col])
+                for col, profile in self.columns.items() if col in previous.columns}
+
+class ProfileStore:
+    """Persists table profiles per run next to data_quality_logs"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        ensure_state_tables(conn)
+        return conn
+
+    def record(self, run_id, table_name, profile):
+        """Write the summary and serialized sketches of every column"""
+        rows = []
+        for col, column in profile.columns.items():
+            summary = column.summary()
+            rows.append((run_id, table_name, col, summary['row_count'], summary['null_count'],
+                         summary['distinct_estimate'], _text(summary['min_value']), _text(summary['max_value']),
+                         json.dumps(summary['quantiles']), json.dumps(summary['top_values']),
+                         json.dumps(column.to_dict())))
+
+        conn = self._connect()
+        try:
+            conn.executemany("""
+                INSERT INTO data_profiles (run_id, table_name, column_name, row_count, null_count,
+                    distinct_estimate, min_value, max_value, quantiles, top_values, sketch)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_last_profile(self, table_name):
+        """Return the profile recorded for a table by the last completed run"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("""
+                SELECT p.column_name, p.sketch FROM data_profiles p
+                WHERE p.table_name = ? AND p.run_id = (
+                    SELECT MAX(r.run_id) FROM pipeline_runs r
+                    JOIN data_profiles d ON d.run_id = r.run_id
+                    WHERE d.table_name = ? AND r.status = 'COMPLETED'
+                )
+            """, (table_name, table_name)).fetchall()
+        finally:
+            conn.close()
+
+        if not rows:
+            return None
+
+        return DataProfile({col: ColumnProfile.from_dict(json.loads(sketch)) for col, sketch in rows})
+
+def _hll_registers(hashes):
+    """HyperLogLog registers for 64-bit hashes: the max leading-zero rank per bucket"""
+    m = 1 << HLL_PRECISION
+    buckets = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.intp)
+    rest = hashes << np.uint64(HLL_PRECISION)
+
+    # Rank = leading zeros of the remaining bits + 1
+    with np.errstate(divide='ignore'):
+        ranks = np.where(rest == 0, 64 - HLL_PRECISION + 1,
+                         64 - np.floor(np.log2(rest.astype(np.float64)))).astype(np.intp)
+
+    seen = np.zeros((m, 66), dtype=bool)
+    seen[buckets, ranks] = True
+    highest = seen.shape[1] - 1 - np.argmax(seen[:, ::-1], axis=1)
+    return np.where(seen.any(axis=1), highest, 0).astype(np.uint8)
+
+def _compress(means, weights, compression=DIGEST_COMPRESSION):
+    """Merge sorted weighted points into t-digest centroids (k1 scale function)"""
+    order = np.argsort(means, kind='stable')
+    means, weights = means[order], weights[order]
+    total = weights.sum()
+
+    # Points whose cumulative weight falls in the same unit of the k-scale share a centroid
+    q = (np.cumsum(weights) - weights) / total
+    k = compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+    groups = np.floor(k - k[0]).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+
+    merged_weights = np.add.reduceat(weights, starts)
+    merged_means = np.add.reduceat(means * weights, starts) / merged_weights
+    return merged_means, merged_weights
+
+def _top_values(counts, capacity):
+    """Misra-Gries reduction of value counts to at most capacity counters"""
+    counts = counts[counts > 0].sort_values(ascending=False, kind='stable')
+    if len(counts) > capacity:
+        counts = counts.iloc[:capacity] - counts.iloc[capacity]
+        counts = counts[counts > 0]
+
+    return {(value.item() if hasattr(value, 'item') else value): int(count) for value, count in counts.items()}
+
+def _share_distance(current, previous):
+    """Total variation distance between the top-value shares of two profiles"""
+    current_shares = {str(value): count / max(current.count - current.nulls, 1) for value, count in current.top.items()}
+    previous_shares = {str(value): count / max(previous.count - previous.nulls, 1) for value, count in previous.top.items()}
+    values = set(current_shares) | set(previous_shares)
+    tracked = sum(abs(current_shares.get(v, 0) - previous_shares.get(v, 0)) for v in values)
+    untracked = abs((1 - sum(current_shares.values())) - (1 - sum(previous_shares.values())))
+
+    return min((tracked + untracked) / 2, 1.0)
+
+def _text(value):
+    return None if value is None else str(value)
@@ -0,0 +1,142 @@
+"""
+SQL pushdown of data quality rules for loaded tables
+"""
+import pandas as pd
+from loguru import logger
+
+# Custom-check predicates as SQL; values are bound as parameters
+SQL_OPERATORS = {
+    '<': '{col} < ?',
+    '<=': '{col} <= ?',
+    '>': '{col} > ?',
+    '>=': '{col} >= ?',
+    '==': '{col} = ?',
+    # Missing values never contain a substring, as in the pandas checks
+    'not_contains': 'COALESCE(instr({col}, ?), 0) = 0'
+}
+
+class PushdownQualityExecutor:
+    """Runs a table's quality rules where its data lives
+
+    The caller knows where a relation's rows are: when it passes a frame that
+    holds exactly the relation's rows (e.g. the load that filled an empty
+    table) the frame is validated with DataQualityManager in pandas, costing no
+    scan of the table. Otherwise the relation is validated with one generated
+    aggregate query, so its rows never come back into Python. Both paths return
+    results in the shape of DataQualityManager.validate_data, the SQL one
+    following SQLite semantics: sale_date must parse with datetime() instead of
+    having a datetime dtype.
+    """
+
+    def __init__(self, quality_manager):
+        self.quality_manager = quality_manager
+
+    def validate(self, table_name, df=None, conn=None, relation=None):
+        """Validate df (the exact rows of relation) in pandas when given, otherwise relation in SQL"""
+        if df is not None:
+            return self.quality_manager.validate_data(df, table_name, profile=False)
+
+        return self.validate_sql(conn, table_name, relation or table_name)
+
+    def validate_sql(self, conn, table_name, relation):
+        """Run the rules of table_name against a database relation with a single query"""
+        rules = self.quality_manager.rules.get(table_name)
+        if rules is None:
+            return {}
+
+        logger.info(f"Running pushdown quality checks for {table_name} on {relation}")
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({self._quote(relation)})")]
+        sql, params, outputs = self.compile(table_name, relation, columns)
+        row = conn.execute(sql, params).fetchone()
+        counts = {name: int(value or 0) for name, value in zip(outputs, row)}
+
+        return self._assemble(rules, columns, counts)
+
+    def compile(self, table_name, relation, columns):
+        """Return (sql, params, outputs): one aggregate query counting every rule violation
+
+        Only rules whose columns exist in the relation are compiled, so column
+        names in the query always come from the database itself.
+        """
+        rules = self.quality_manager.rules.get(table_name, {})
+        date_columns = rules.get('date_columns', [])
+        now = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+        aggregates, params, outputs = ['COUNT(*)'], [], ['row_count']
+
+        def count(name, condition, values=()):
+            aggregates.append(f"COALESCE(SUM(CASE WHEN {condition} THEN 1 ELSE 0 END), 0)")
+            params.extend(values)
+            outputs.append(name)
+
+        for col in rules.get('not_null_columns', []):
+            if col in columns:
+                count(f"null:{col}", f"{self._quote(col)} IS NULL")
+
+        for col, bounds in rules.get('numeric_ranges', {}).items():
+            if col in columns:
+                count(f"below:{col}", f"{self._quote(col)} < ?", [bounds.get('min', float('-inf'))])
+                count(f"above:{col}", f"{self._quote(col)} > ?", [bounds.get('max', float('inf'))])
+
+        for col in rules.get('unique_columns', []):
+            if col in columns:
+                # Like pandas duplicated(), every missing value after the first is a duplicate
+                quoted = self._quote(col)
+                aggregates.append(f"COALESCE(COUNT(*) - COUNT(DISTINCT {quoted}) - MAX({quoted} IS NULL), 0)")
+                outputs.append(f"duplicate:{col}")
+
+        for col in date_columns:
+            if col in columns:
+                count(f"unparsed:{col}", f"{self._quote(col)} IS NOT NULL AND datetime({self._quote(col)}) IS NULL")
+
+        for col in rules.get('numeric_columns', []):
+            if col in columns:
+                count(f"non_numeric:{col}", f"typeof({self._quote(col)}) NOT IN ('integer', 'real', 'null')")
+
+        for index, (_, predicates) in enumerate(rules.get('custom_checks', [])):
+            if all(col in columns for col, _, _ in predicates):
+                conditions, values = [], []
+                for col, op, value in predicates:
+                    target = f"datetime({self._quote(col)})" if col in date_columns else self._quote(col)
+                    conditions.append(SQL_OPERATORS[op].format(col=target))
+                    values.append(now if value == 'now' else value)
+                count(f"custom:{index}", ' AND '.join(conditions), values)
+
+        sql = f"SELECT {', '.join(aggregates)} FROM {self._quote(relation)}"
+        return sql, params, outputs
+
+    def _assemble(self, rules, columns, counts):
+        """Shape violation counts like DataQualityManager.validate_data results"""
+        missing_columns = [col for col in rules.get('required_columns', []) if col not in columns]
+        null_counts = {col: counts[f"null:{col}"] for col in rules.get('not_null_columns', [])
+                       if counts.get(f"null:{col}", 0) > 0}
+
+        out_of_range = {}
+        for col in rules.get('numeric_ranges', {}):
+            below, above = counts.get(f"below:{col}", 0), counts.get(f"above:{col}", 0)
+            if below > 0 or above > 0:
+                out_of_range[col] = {'below_min': below, 'above_max': above}
+
+        duplicate_counts = {col: counts[f"duplicate:{col}"] for col in rules.get('unique_columns', [])
+                            if counts.get(f"duplicate:{col}", 0) > 0}
+
+        type_issues = [f"{col} should be datetime type" for col in rules.get('date_columns', [])
+                       if counts.get(f"unparsed:{col}", 0) > 0]
+        type_issues.extend(f"{col} should be numeric type" for col in rules.get('numeric_columns', [])
+                           if counts.get(f"non_numeric:{col}", 0) > 0)
+
+        issues = [message.format(count=counts[f"custom:{index}"])
+                  for index, (message, _) in enumerate(rules.get('custom_checks', []))
+                  if counts.get(f"custom:{index}", 0) > 0]
+
+        return {
+            'required_columns': {'passed': len(missing_columns) == 0, 'details': {'missing_columns': missing_columns}},
+            'not_null_columns': {'passed': len(null_counts) == 0, 'details': {'null_counts': null_counts}},
+            'numeric_ranges': {'passed': len(out_of_range) == 0, 'details': {'out_of_range': out_of_range}},
+            'unique_columns': {'passed': len(duplicate_counts) == 0, 'details': {'duplicate_counts': duplicate_counts}},
+            'data_types': {'passed': len(type_issues) == 0, 'details': {'issues': type_issues}},
+            'custom_checks': {'passed': len(issues) == 0, 'details': {'issues': issues}}
+        }
+
+    def _quote(self, name):
+        """Quote an SQLite identifier"""
+        return '"' + name.replace('"', '""') + '"'
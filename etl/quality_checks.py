@@ -4,11 +4,36 @@ Data quality checks for the sales analytics pipeline
 import pandas as pd
 import numpy as np
 from loguru import logger
+from etl.dates import DateParser
+from etl.profiling import DataProfile
+from etl.quality_engine import FusedQualityEngine, evaluate_predicate
 
 class DataQualityManager:
     """Manages data quality checks for the pipeline"""
 
-    def __init__(self):
+    # Registry of the checks validate_data runs, in order: check_type -> fn(manager, df, rules).
+    # Adding a check here also makes the pipeline's QualityGate expect it.
+    CHECKS = {
+        'required_columns': lambda self, df, rules: self._check_required_columns(df, rules.get('required_columns', [])),
+        'not_null_columns': lambda self, df, rules: self._check_not_null(df, rules.get('not_null_columns', [])),
+        'numeric_ranges': lambda self, df, rules: self._check_numeric_ranges(df, rules.get('numeric_ranges', {})),
+        'unique_columns': lambda self, df, rules: self._check_unique_columns(df, rules.get('unique_columns', [])),
+        'data_types': lambda self, df, rules: self._check_data_types(df, rules),
+        'custom_checks': lambda self, df, rules: self._run_custom_checks(df, rules)
+    }
+
+    def __init__(self, date_parser=None, fused=False, profiling=False):
+        # Shared with the transformer so date strings are never parsed twice
+        self.date_parser = date_parser or DateParser()
+        self.engine = FusedQualityEngine(self.date_parser) if fused else None
+        # In profiling mode every validated chunk is merged into a per-table profile
+        self.profiling = profiling
+        self.profiles = {}
+        # The single definition of every rule; the pandas checks, the fused engine,
+        # column pruning and the SQL pushdown are all derived from it.
+        # custom_checks are (message, [(column, op, value), ...]) conjunctions, where
+        # op is a comparison or 'not_contains' and the value 'now' is the current time.
+        # A custom check runs only when all its columns exist.
         self.rules = {
             'sales': {
                 'required_columns': ['sale_id', 'product_id', 'customer_id', 'quantity', 'amount', 'sale_date'],
@@ -17,7 +42,13 @@ class DataQualityManager:
                     'quantity': {'min': 0, 'max': 1000},
                     'amount': {'min': 0, 'max': 1000000}
                 },
-                'unique_columns': ['sale_id']
+                'unique_columns': ['sale_id'],
+                'date_columns': ['sale_date'],
+                'numeric_columns': ['quantity', 'amount', 'price_per_unit'],
+                'custom_checks': [
+                    ("{count} records have quantity but zero amount", [('quantity', '>', 0), ('amount', '==', 0)]),
+                    ("{count} records have future sale dates", [('sale_date', '>', 'now')])
+                ]
             },
             'products': {
                 'required_columns': ['product_id', 'product_name', 'category', 'price'],
@@ -25,40 +56,81 @@ class DataQualityManager:
                 'numeric_ranges': {
                     'price': {'min': 0, 'max': 10000}
                 },
-                'unique_columns': ['product_id']
+                'unique_columns': ['product_id'],
+                'custom_checks': [
+                    ("{count} products have zero or negative prices", [('price', '<=', 0)])
+                ]
             },
             'customers': {
                 'required_columns': ['customer_id', 'customer_name', 'email', 'region'],
                 'not_null_columns': ['customer_id', 'customer_name'],
-                'unique_columns': ['customer_id', 'email']
+                'unique_columns': ['customer_id', 'email'],
+                'custom_checks': [
+                    ("{count} customers have invalid email formats", [('email', 'not_contains', '@')])
+                ]
             }
         }
 
-    def validate_data(self, df, table_name):
-        """Run all quality checks for a given dataframe"""
+    def get_rule_columns(self, table_name):
+        """Return every column referenced by the quality rules for a table"""
+        rules = self.rules.get(table_name, {})
+        columns = list(rules.get('required_columns', []))
+        columns.extend(rules.get('not_null_columns', []))
+        columns.extend(rules.get('numeric_ranges', {}).keys())
+        columns.extend(rules.get('unique_columns', []))
+        # Type checks only apply to columns that are present, so they do not keep columns alive
+        columns.extend(col for _, predicates in rules.get('custom_checks', []) for col, _, _ in predicates)
+
+        return list(dict.fromkeys(columns))
+
+    # Pipeline metadata that changes every run by design and is never profiled
+    UNPROFILED_COLUMNS = ['transformed_at']
+
+    def profile_data(self, df, table_name):
+        """Merge a chunk's column sketches into the table's profile and return it"""
+        profile = self.profiles.setdefault(table_name, DataProfile())
+        columns = [col for col in df.columns if col not in self.UNPROFILED_COLUMNS]
+        return profile.update(df, columns)
+
+    def reset_profiles(self):
+        """Start new profiles, e.g. at the beginning of a run"""
+        self.profiles = {}
+
+    def get_check_types(self, table_name):
+        """Return the checks validate_data runs for a table, in order"""
+        if table_name not in self.rules:
+            return []
+
+        return list(self.CHECKS)
+
+    def validate_data(self, df, table_name, gate=None, profile=True):
+        """Run all quality checks for a given dataframe
+
+        With a QualityGate, each result is recorded as it is produced and the
+        remaining checks are skipped once the gate says the run must stop.
+        profile=False keeps re-validated data (e.g. after a load) out of the profiles.
+        """
         logger.info(f"Running quality checks for {table_name}")
 
+        if self.profiling and profile:
+            self.profile_data(df, table_name)
+
         results = {}
         if table_name in self.rules:
             rules = self.rules[table_name]
 
-            # Check required columns
-            results['required_columns'] = self._check_required_columns(df, rules.get('required_columns', []))
-
-            # Check not null columns
-            results['not_null_columns'] = self._check_not_null(df, rules.get('not_null_columns', []))
-
-            # Check numeric ranges
-            results['numeric_ranges'] = self._check_numeric_ranges(df, rules.get('numeric_ranges', {}))
+            # The fused engine answers every data-dependent rule with one pass per column
+            scanned = self.engine.validate(df, table_name, rules) if self.engine else None
 
-            # Check unique columns
-            results['unique_columns'] = self._check_unique_columns(df, rules.get('unique_columns', []))
-
-            # Check data types
-            results['data_types'] = self._check_data_types(df, table_name)
-
-            # Run custom checks
-            results['custom_checks'] = self._run_custom_checks(df, table_name)
+            for check_type, check in self.CHECKS.items():
+                # Checks the fused engine already answered are not run again
+                results[check_type] = scanned[check_type] if scanned and check_type in scanned else \
+                    check(self, df, rules)
+                if gate is not None:
+                    gate.record(table_name, check_type, results[check_type]['passed'])
+                    # Stop as soon as the gate can no longer be met
+                    if gate.should_stop():
+                        break
 
         return results
 
@@ -129,20 +201,19 @@ class DataQualityManager:
             }
         }
 
-    def _check_data_types(self, df, table_name):
+    def _check_data_types(self, df, rules):
         """Check if data types are appropriate"""
         issues = []
 
-        if table_name == 'sales':
-            # Check if sale_date is datetime
-            if 'sale_date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['sale_date']):
-                issues.append("sale_date should be datetime type")
+        # Check if date columns are datetime
+        for col in rules.get('date_columns', []):
+            if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+                issues.append(f"{col} should be datetime type")
 
-            # Check if numeric columns are numeric
-            numeric_cols = ['quantity', 'amount', 'price_per_unit']
-            for col in numeric_cols:
-                if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
-                    issues.append(f"{col} should be numeric type")
+        # Check if numeric columns are numeric
+        for col in rules.get('numeric_columns', []):
+            if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+                issues.append(f"{col} should be numeric type")
 
         return {
             'passed': len(issues) == 0,
@@ -151,36 +222,22 @@ class DataQualityManager:
             }
         }
 
-    def _run_custom_checks(self, df, table_name):
-        """Run custom data quality checks specific to each table"""
+    def _run_custom_checks(self, df, rules):
+        """Run the table's custom checks, counting rows where every predicate holds"""
         issues = []
+        now = pd.Timestamp.now()
+        date_columns = rules.get('date_columns', [])
+
+        for message, predicates in rules.get('custom_checks', []):
+            if not all(col in df.columns for col, _, _ in predicates):
+                continue
 
-        if table_name == 'sales':
-            # Check if quantity and amount are consistent
-            if 'quantity' in df.columns and 'amount' in df.columns:
-                zero_amount_with_quantity = ((df['quantity'] > 0) & (df['amount'] == 0)).sum()
-                if zero_amount_with_quantity > 0:
-                    issues.append(f"{zero_amount_with_quantity} records have quantity but zero amount")
-
-            # Check for future dates
-            if 'sale_date' in df.columns:
-                future_dates = (pd.to_datetime(df['sale_date']) > pd.Timestamp.now()).sum()
-                if future_dates > 0:
-                    issues.append(f"{future_dates} records have future sale dates")
-
-        elif table_name == 'products':
-            # Check for zero or negative prices
-            if 'price' in df.columns:
-                invalid_prices = (df['price'] <= 0).sum()
-                if invalid_prices > 0:
-                    issues.append(f"{invalid_prices} products have zero or negative prices")
-
-        elif table_name == 'customers':
-            # Check email format
-            if 'email' in df.columns:
-                invalid_emails = (~df['email'].str.contains('@', na=False)).sum()
-                if invalid_emails > 0:
-                    issues.append(f"{invalid_emails} customers have invalid email formats")
+            truth = [evaluate_predicate(self.date_parser.parse(df[col]) if col in date_columns else df[col],
+                                        op, now if value == 'now' else value)
+                     for col, op, value in predicates]
+            count = int(np.logical_and.reduce(truth).sum())
+            if count > 0:
+                issues.append(message.format(count=count))
 
         return {
             'passed': len(issues) == 0,
@@ -205,4 +262,94 @@ class DataQualityManager:
                 report.append(f"  Details: {result['details']}")
 
         report.insert(0, f"Quality Check Summary: {passed_checks}/{total_checks} checks passed")
-        return "\n".join(report)
\ No newline at end of file
+        return "\n".join(report)
+
+class QualityGateError(Exception):
+    """Raised when a run's quality checks cannot meet the configured threshold"""
+
+class QualityGate:
+    """Enforces the quality_checks threshold on the pass ratio of a run's checks
+
+    The pass ratio is passed checks over checks run. Checks announced with
+    expect() but not yet recorded are pending: while the ratio could still reach
+    the threshold if they all pass, the gate stays open. With fail_on_error the
+    run stops once the threshold is out of reach and again before any load whose
+    ratio falls short; otherwise a shortfall is only logged as a warning.
+
+    A gate with bounded=False (streaming) cannot know how many batches, and so
+    checks, are still to come, so reachability has no upper bound. It stops once
+    the checks announced for a batch have run and the ratio so far is below the
+    threshold, and says so. A stop rolls back the batches already loaded (see
+    SalesDataPipeline._run_streaming).
+    """
+
+    def __init__(self, threshold=0.0, fail_on_error=False, bounded=True):
+        self.threshold = threshold
+        self.fail_on_error = fail_on_error
+        self.bounded = bounded
+        self.passed = 0
+        self.total = 0
+        self.pending = 0
+        self.failed_checks = []
+        self._warned = False
+
+    @property
+    def pass_ratio(self):
+        """Share of recorded checks that passed (1.0 before any check ran)"""
+        return self.passed / self.total if self.total else 1.0
+
+    def expect(self, count):
+        """Announce checks that will run before the next load"""
+        self.pending += count
+
+    def record(self, table_name, check_type, passed):
+        """Record the outcome of one check"""
+        self.total += 1
+        self.pending = max(self.pending - 1, 0)
+        if passed:
+            self.passed += 1
+        else:
+            self.failed_checks.append(f"{table_name}.{check_type}")
+
+    def is_reachable(self):
+        """Check whether the threshold can still be met if every pending check passes"""
+        total = self.total + self.pending
+        return total == 0 or (self.passed + self.pending) / total >= self.threshold
+
+    def should_stop(self):
+        """Check whether the run must stop: threshold out of reach, or (unbounded) ratio so far below it"""
+        if not self.fail_on_error:
+            return False
+        if not self.bounded:
+            return self.pending == 0 and self.pass_ratio < self.threshold
+
+        return not self.is_reachable()
+
+    def check_reachable(self):
+        """Raise QualityGateError when the run must stop"""
+        if not self.should_stop():
+            return
+
+        failed = ', '.join(self.failed_checks)
+        if not self.bounded:
+            raise QualityGateError(f"Quality pass ratio so far {self.pass_ratio:.2%} is below threshold "
+                                   f"{self.threshold:.2%}: {self.passed}/{self.total} checks passed "
+                                   f"(checks of later batches are unknown; failed: {failed})")
+
+        raise QualityGateError(f"Quality threshold {self.threshold:.2%} can no longer be met: "
+                               f"{self.passed}/{self.total} checks passed, {self.pending} pending "
+                               f"(failed: {failed})")
+
+    def enforce(self):
+        """Raise (fail_on_error) or warn when the pass ratio so far is below the threshold"""
+        if self.pass_ratio >= self.threshold:
+            return
+
+        message = (f"Quality pass ratio {self.pass_ratio:.2%} is below threshold {self.threshold:.2%} "
+                   f"({self.passed}/{self.total} checks passed; failed: {', '.join(self.failed_checks)})")
+        if self.fail_on_error:
+            raise QualityGateError(message)
+
+        if not self._warned:
+            logger.warning(message)
+            self._warned = True
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Fused single-pass evaluation of data quality rules
+"""
+import operator
+import numpy as np
+import pandas as pd
+
+COMPARISONS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq
+}
+
+# Rows per block: small enough for a block of one column to stay in cache
+BLOCK_ROWS = 65536
+
+class FusedQualityEngine:
+    """Evaluates a table's quality rules with one pass per column block
+
+    Rules are compiled into per-column work so the null count, range bounds
+    and custom-check predicates of a column are answered together. Numeric and
+    datetime columns are walked in row blocks: each block is read from memory
+    once and every predicate (and every multi-column check) is counted while it
+    is in cache, without materializing full-length masks. Text columns are
+    factorized once and their predicates evaluated on the distinct values only.
+    Results match DataQualityManager's reference checks.
+    """
+
+    def __init__(self, date_parser, block_rows=BLOCK_ROWS):
+        self.date_parser = date_parser
+        self.block_rows = block_rows
+
+    def validate(self, df, table_name, rules):
+        """Return the not-null, range, uniqueness and custom-check results for a table"""
+        now = pd.Timestamp.now()
+        not_null = [col for col in rules.get('not_null_columns', []) if col in df.columns]
+        ranges = {col: (bounds.get('min', float('-inf')), bounds.get('max', float('inf')))
+                  for col, bounds in rules.get('numeric_ranges', {}).items() if col in df.columns}
+        unique = [col for col in rules.get('unique_columns', []) if col in df.columns]
+        checks = [(message, [(col, op, now if value == 'now' else value) for col, op, value in predicates])
+                  for message, predicates in rules.get('custom_checks', [])
+                  if all(col in df.columns for col, _, _ in predicates)]
+
+        # Compile the predicates each column has to answer
+        predicates = {col: [] for col in dict.fromkeys(not_null + unique + list(ranges))}
+        for col, (low, high) in ranges.items():
+            predicates[col].extend([('<', low), ('>', high)])
+        for _, conjunction in checks:
+            for col, op, value in conjunction:
+                predicates.setdefault(col, []).append((op, value))
+
+        counts = {}
+        nulls = {}
+        masks = {}
+        blocked = {}
+        date_columns = rules.get('date_columns', [])
+
+        for col, column_predicates in predicates.items():
+            column_predicates = list(dict.fromkeys(column_predicates))
+            series = df[col]
+            if col in date_columns and any(isinstance(value, pd.Timestamp) for _, value in column_predicates):
+                series = self.date_parser.parse(series)
+
+            if any(op == 'not_contains' for op, _ in column_predicates):
+                self._scan_distinct(col, series, column_predicates, counts, nulls, masks)
+            elif isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufM':
+                blocked[col] = (series.to_numpy(), column_predicates)
+            else:
+                self._scan_rows(col, series, column_predicates, counts, nulls, masks)
+
+        self._scan_blocks(len(df), blocked, checks, counts, nulls, masks)
+        duplicates = {col: int(df[col].duplicated().sum()) for col in unique}
+
+        # Assemble results in the same shape and order as the reference checks
+        null_counts = {col: nulls[col] for col in not_null if nulls[col] > 0}
+
+        out_of_range = {}
+        for col, (low, high) in ranges.items():
+            below, above = counts[(col, '<', low)], counts[(col, '>', high)]
+            if below > 0 or above > 0:
+                out_of_range[col] = {'below_min': below, 'above_max': above}
+
+        issues = []
+        for message, conjunction in checks:
+            count = counts[conjunction[0]] if len(conjunction) == 1 else counts[tuple(conjunction)]
+            if count > 0:
+                issues.append(message.format(count=count))
+
+        duplicate_counts = {col: count for col, count in duplicates.items() if count > 0}
+
+        return {
+            'not_null_columns': {'passed': len(null_counts) == 0, 'details': {'null_counts': null_counts}},
+            'numeric_ranges': {'passed': len(out_of_range) == 0, 'details': {'out_of_range': out_of_range}},
+            'unique_columns': {'passed': len(duplicate_counts) == 0, 'details': {'duplicate_counts': duplicate_counts}},
+            'custom_checks': {'passed': len(issues) == 0, 'details': {'issues': issues}}
+        }
+
+    def _scan_blocks(self, rows, blocked, checks, counts, nulls, masks):
+        """Count nulls, predicates and multi-column checks block by block"""
+        for col, (_, column_predicates) in blocked.items():
+            nulls[col] = 0
+            for op, value in column_predicates:
+                counts[(col, op, value)] = 0
+
+        conjunctions = [tuple(conjunction) for _, conjunction in checks if len(conjunction) > 1]
+        for conjunction in conjunctions:
+            counts[conjunction] = 0
+
+        for start in range(0, rows, self.block_rows):
+            stop = start + self.block_rows
+            block_masks = {}
+
+            for col, (values, column_predicates) in blocked.items():
+                block = values[start:stop]
+                if block.dtype.kind == 'f':
+                    nulls[col] += int(np.count_nonzero(np.isnan(block)))
+                elif block.dtype.kind == 'M':
+                    nulls[col] += int(np.count_nonzero(np.isnat(block)))
+
+                for op, value in column_predicates:
+                    truth = COMPARISONS[op](block, np.datetime64(value) if block.dtype.kind == 'M' else value)
+                    counts[(col, op, value)] += int(np.count_nonzero(truth))
+                    block_masks[(col, op, value)] = truth
+
+            for conjunction in conjunctions:
+                truth = [block_masks[predicate] if predicate in block_masks else masks[predicate][start:stop]
+                         for predicate in conjunction]
+                counts[conjunction] += int(np.count_nonzero(np.logical_and.reduce(truth)))
+
+    def _scan_distinct(self, col, series, column_predicates, counts, nulls, masks):
+        """Factorize a text column once and evaluate its predicates on the distinct values"""
+        codes, uniques = pd.factorize(series)
+        value_counts = np.bincount(codes + 1, minlength=len(uniques) + 1)
+        nulls[col] = int(value_counts[0])
+
+        uniques = pd.Series(uniques, dtype=object)
+        for predicate in column_predicates:
+            # Missing values never match a comparison but never contain a substring either
+            truth = np.concatenate([[predicate[0] == 'not_contains'], self._evaluate(uniques, predicate)])
+            counts[(col, *predicate)] = int(value_counts[truth].sum())
+            masks[(col, *predicate)] = truth[codes + 1]
+
+    def _scan_rows(self, col, series, column_predicates, counts, nulls, masks):
+        """Evaluate predicates over whole columns without a numpy dtype"""
+        nulls[col] = int(series.isna().sum())
+        for predicate in column_predicates:
+            truth = self._evaluate(series, predicate)
+            counts[(col, *predicate)] = int(truth.sum())
+            masks[(col, *predicate)] = truth
+
+    def _evaluate(self, series, predicate):
+        """Evaluate one predicate as the reference checks do, returning a bool array"""
+        return evaluate_predicate(series, *predicate)
+
+def evaluate_predicate(series, op, value):
+    """Evaluate one custom-check predicate over a Series, returning a bool array"""
+    if op == 'not_contains':
+        return (~series.str.contains(value, na=False)).to_numpy(dtype=bool)
+
+    result = COMPARISONS[op](series, value)
+    # Nullable dtypes compare missing values as NA, which never matches
+    if hasattr(result, 'to_numpy'):
+        return result.to_numpy(dtype=bool, na_value=False)
+
+    return np.asarray(result, dtype=bool)
@@ -0,0 +1,412 @@
+"""
+Source readers for the sales analytics pipeline
+"""
+import glob
+import operator
+import os
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from loguru import logger
+
+GLOB_CHARS = re.compile(r'[*?[]')
+
+# Comparison operators accepted in partition_filters
+PARTITION_OPERATORS = {
+    '=': operator.eq,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda value, options: value in options,
+    'not in': lambda value, options: value not in options
+}
+
+# Codecs recognised by file extension, then by leading magic bytes
+COMPRESSION_EXTENSIONS = {
+    '.gz': 'gzip',
+    '.gzip': 'gzip',
+    '.zst': 'zstd',
+    '.zstd': 'zstd',
+    '.bz2': 'bz2',
+    '.lz4': 'lz4'
+}
+
+COMPRESSION_MAGIC = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+    (b'BZh', 'bz2'),
+    (b'\x04\x22\x4d\x18', 'lz4')
+]
+
+STREAM_BUFFER_SIZE = 1024 * 1024
+
+class SourceReader:
+    """Reads configured pipeline sources into DataFrames"""
+
+    def __init__(self, db_path, max_workers=1):
+        self.db_path = db_path
+        self.max_workers = max_workers
+
+    def read(self, source):
+        """Read a complete source into a single DataFrame"""
+        if source['type'] == 'database':
+            conn = sqlite3.connect(self.db_path)
+            try:
+                return pd.read_sql_query(source['query'], conn, params=source.get('params'))
+            finally:
+                conn.close()
+        elif self._is_multi_file(source):
+            return self._read_files(source)
+        else:
+            return self._read_file(source)
+
+    def read_batches(self, source, batch_size):
+        """Yield a source as DataFrames of at most batch_size rows"""
+        if source['type'] == 'database':
+            conn = sqlite3.connect(self.db_path)
+            try:
+                yield from pd.read_sql_query(source['query'], conn, params=source.get('params'), chunksize=batch_size)
+            finally:
+                conn.close()
+        elif self._is_multi_file(source):
+            for path, partitions in self._resolve_or_raise(source):
+                for chunk in self._read_file_batches({**source, 'path': path}, batch_size):
+                    yield self._add_partition_columns(chunk, partitions, source)
+        else:
+            yield from self._read_file_batches(source, batch_size)
+
+    def resolve_files(self, source):
+        """Expand a source path into (file path, partition values) pairs
+
+        Directories are walked recursively and glob patterns expanded. With
+        "partitioning": "hive", key=value directories become partition values
+        and files whose partitions fail "partition_filters" are pruned.
+        """
+        path = source['path']
+
+        if os.path.isdir(path):
+            base = path
+            candidates = glob.glob(os.path.join(path, '**', '*'), recursive=True)
+        elif GLOB_CHARS.search(path):
+            base = self._glob_base(path)
+            candidates = glob.glob(path, recursive=True)
+        else:
+            return [(path, {})]
+
+        files = []
+        for file_path in sorted(candidates):
+            # Skip directories and marker files such as _SUCCESS
+            if not os.path.isfile(file_path) or os.path.basename(file_path).startswith(('.', '_')):
+                continue
+
+            partitions = {}
+            if source.get('partitioning') == 'hive':
+                partitions = self._parse_partitions(os.path.relpath(os.path.dirname(file_path), base))
+
+            if self._partition_matches(partitions, source.get('partition_filters')):
+                files.append((file_path, partitions))
+
+        return files
+
+    def _is_multi_file(self, source):
+        """Check whether a source path names a directory or glob pattern"""
+        return os.path.isdir(source['path']) or bool(GLOB_CHARS.search(source['path']))
+
+    def _resolve_or_raise(self, source):
+        files = self.resolve_files(source)
+        if not files:
+            raise FileNotFoundError(f"No files match source path: {source['path']}")
+
+        logger.info(f"Resolved {len(files)} files for {source['name']}")
+        return files
+
+    def _read_files(self, source):
+        """Read every file of a multi-file source, in parallel when workers allow"""
+        files = self._resolve_or_raise(source)
+
+        def read_one(entry):
+            path, partitions = entry
+            return self._add_partition_columns(self._read_file({**source, 'path': path}), partitions, source)
+
+        workers = min(self.max_workers, len(files))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='read') as executor:
+                frames = list(executor.map(read_one, files))
+        else:
+            frames = [read_one(entry) for entry in files]
+
+        return pd.concat(frames, ignore_index=True)
+
+    def _read_file(self, source):
+        """Read a single source file into a DataFrame"""
+        if source['type'] == 'csv':
+            compression = self._detect_compression(source)
+            if compression is None:
+                return pd.read_csv(source['path'], memory_map=bool(source.get('memory_map')),
+                                   **self._csv_options(source))
+
+            with self._open_compressed(source, compression) as stream:
+                return pd.read_csv(stream, **self._csv_options(source))
+        elif source['type'] in ('parquet', 'arrow_ipc'):
+            return self._to_pandas(self._read_columnar(source), source)
+        else:
+            raise ValueError(f"Unsupported source type: {source['type']}")
+
+    def _read_file_batches(self, source, batch_size):
+        """Yield a single source file as DataFrames of at most batch_size rows"""
+        if source['type'] == 'csv':
+            compression = self._detect_compression(source)
+            if compression is None:
+                yield from pd.read_csv(source['path'], chunksize=batch_size, memory_map=bool(source.get('memory_map')),
+                                       **self._csv_options(source))
+                return
+
+            # Decompress block by block as the parser pulls chunks; nothing is inflated up front
+            with self._open_compressed(source, compression) as stream:
+                yield from pd.read_csv(stream, chunksize=batch_size, **self._csv_options(source))
+        elif source['type'] in ('parquet', 'arrow_ipc'):
+            for batch in self._iter_columnar_batches(source, batch_size):
+                yield self._to_pandas(batch, source)
+        else:
+            raise ValueError(f"Unsupported source type: {source['type']}")
+
+    def _detect_compression(self, source):
+        """Return the codec wrapping a source file, or None when it is not compressed
+
+        "compression" in the source config may name a codec or "none"; by default
+        it is inferred from the file extension and then the file's magic bytes.
+        """
+        compression = source.get('compression', 'infer')
+        if compression != 'infer':
+            return None if compression in (None, 'none') else compression
+
+        extension = os.path.splitext(source['path'])[1].lower()
+        if extension in COMPRESSION_EXTENSIONS:
+            return COMPRESSION_EXTENSIONS[extension]
+
+        with open(source['path'], 'rb') as f:
+            header = f.read(4)
+        for magic, codec in COMPRESSION_MAGIC:
+            if header.startswith(magic):
+                return codec
+
+        return None
+
+    def _open_compressed(self, source, compression):
+        """Open a compressed file as a streaming, decompressing input stream"""
+        return pa.input_stream(source['path'], compression=compression, buffer_size=STREAM_BUFFER_SIZE)
+
+    def _inflate(self, source, compression):
+        """Decompress a whole file into an in-memory Arrow buffer"""
+        logger.info(f"Inflating {compression} compressed {source['path']} in memory for random access")
+        with self._open_compressed(source, compression) as stream:
+            return stream.read_buffer()
+
+    def _add_partition_columns(self, df, partitions, source):
+        """Attach partition values as constant columns, honouring the column projection"""
+        columns = source.get('columns')
+        for key, value in partitions.items():
+            if key not in df.columns and (columns is None or key in columns):
+                df[key] = value
+
+        return df
+
+    def _glob_base(self, path):
+        """Return the leading directory of a glob pattern that contains no wildcards"""
+        parts = []
+        for part in path.split(os.sep):
+            if GLOB_CHARS.search(part):
+                break
+            parts.append(part)
+
+        return os.sep.join(parts) or '.'
+
+    def _parse_partitions(self, relative_dir):
+        """Parse Hive-style key=value directory names into partition values"""
+        partitions = {}
+        for segment in relative_dir.split(os.sep):
+            if '=' in segment:
+                key, value = segment.split('=', 1)
+                partitions[key] = unquote(value)
+
+        return partitions
+
+    def _partition_matches(self, partitions, filters):
+        """Evaluate DNF partition filters against a file's partition values"""
+        if not filters:
+            return True
+
+        # A flat list of predicates is one conjunction; nested lists are OR-ed conjunctions
+        disjunction = [filters] if isinstance(filters[0][0], str) else filters
+        return any(all(self._partition_predicate(partitions, *predicate) for predicate in conjunction)
+                   for conjunction in disjunction)
+
+    def _partition_predicate(self, partitions, key, op, value):
+        if key not in partitions:
+            raise ValueError(f"Partition filter references unknown partition key: {key}")
+        if op not in PARTITION_OPERATORS:
+            raise ValueError(f"Unsupported partition filter operator: {op}")
+
+        # Partition values are strings; compare numerically when the filter value is a number
+        actual = partitions[key]
+        sample = value[0] if op in ('in', 'not in') and value else value
+        if isinstance(sample, (int, float)) and not isinstance(sample, bool):
+            actual = type(sample)(actual)
+
+        return PARTITION_OPERATORS[op](actual, value)
+
+    def _read_columnar(self, source):
+        """Read a Parquet or Arrow IPC source into an Arrow table"""
+        if source.get('row_groups') is not None and source['type'] == 'parquet':
+            parquet_file = self._open_parquet_file(source)
+            columns, row_filter = self._columnar_options(source, parquet_file.schema_arrow)
+            table = parquet_file.read_row_groups(source['row_groups'],
+                                                 columns=self._scan_columns(source, columns))
+            return self._filter_projected(table, row_filter, columns)
+
+        # The dataset scanner prunes Parquet row groups whose statistics cannot match the filter
+        dataset = self._columnar_dataset(source)
+        columns, row_filter = self._columnar_options(source, dataset.schema)
+        return dataset.to_table(columns=columns, filter=row_filter)
+
+    def _iter_columnar_batches(self, source, batch_size):
+        """Yield filtered, projected record batches from a Parquet or Arrow IPC source"""
+        if source.get('row_groups') is not None and source['type'] == 'parquet':
+            parquet_file = self._open_parquet_file(source)
+            columns, row_filter = self._columnar_options(source, parquet_file.schema_arrow)
+            for batch in parquet_file.iter_batches(batch_size=batch_size,
+                                                   row_groups=source['row_groups'],
+                                                   columns=self._scan_columns(source, columns)):
+                batch = self._filter_projected(pa.Table.from_batches([batch]), row_filter, columns)
+                if batch.num_rows:
+                    yield batch
+            return
+
+        dataset = self._columnar_dataset(source)
+        columns, row_filter = self._columnar_options(source, dataset.schema)
+        for batch in dataset.to_batches(columns=columns, filter=row_filter, batch_size=batch_size):
+            if batch.num_rows:
+                yield batch
+
+    def _columnar_dataset(self, source):
+        """Open a Parquet or Arrow IPC file as a pyarrow dataset"""
+        file_format = 'parquet' if source['type'] == 'parquet' else 'ipc'
+        compression = self._detect_compression(source)
+        if compression is None:
+            # A memory-mapped filesystem lets scans reference the OS page cache instead of copying the file
+            filesystem = pafs.LocalFileSystem(use_mmap=True) if source.get('memory_map') else None
+            return ds.dataset(source['path'], format=file_format, filesystem=filesystem)
+
+        # Both formats need random access to their footer, so an externally
+        # compressed file is inflated into memory (never to disk) and scanned there.
+        # Codecs inside the file (Parquet page compression) are decoded while scanning.
+        buffer = self._inflate(source, compression)
+        if source['type'] == 'parquet':
+            # Scan the in-memory file as a fragment so projection and row-group pruning still apply
+            parquet_format = ds.ParquetFileFormat()
+            fragment = parquet_format.make_fragment(pa.BufferReader(buffer))
+            return ds.FileSystemDataset([fragment], fragment.physical_schema, parquet_format)
+
+        # Arrow IPC record batches reference the inflated buffer without copying
+        return ds.dataset(pa.ipc.open_file(buffer).read_all())
+
+    def _open_parquet_file(self, source):
+        compression = self._detect_compression(source)
+        if compression is None:
+            return pq.ParquetFile(source['path'], memory_map=bool(source.get('memory_map')))
+
+        return pq.ParquetFile(pa.BufferReader(self._inflate(source, compression)))
+
+    def _to_pandas(self, data, source):
+        """Convert an Arrow table or batch to pandas
+
+        Memory-mapped Arrow IPC sources become Arrow-backed DataFrames that keep
+        pointing at the mapped pages; set "arrow_backed": false to get NumPy dtypes.
+        """
+        arrow_backed = source.get('arrow_backed', source['type'] == 'arrow_ipc' and bool(source.get('memory_map')))
+        if arrow_backed:
+            return data.to_pandas(types_mapper=pd.ArrowDtype)
+
+        return data.to_pandas()
+
+    def _columnar_options(self, source, schema):
+        """Translate the source's column projection and DNF filters into Arrow scan options"""
+        columns = source.get('columns')
+        if columns is not None:
+            # Projected columns absent from the file are left for the quality checks to report
+            columns = [col for col in columns if col in schema.names]
+
+        filters = source.get('filters')
+        row_filter = pq.filters_to_expression(filters) if filters else None
+        return columns, row_filter
+
+    def _scan_columns(self, source, columns):
+        """Projected columns plus the columns the source's filters read (None reads everything)"""
+        filters = source.get('filters')
+        if columns is None or not filters:
+            return columns
+
+        # A flat list of predicates is one conjunction; nested lists are OR-ed conjunctions
+        disjunction = [filters] if isinstance(filters[0][0], str) else filters
+        filter_columns = [predicate[0] for conjunction in disjunction for predicate in conjunction]
+        return list(dict.fromkeys(columns + filter_columns))
+
+    def _filter_projected(self, table, row_filter, columns):
+        """Filter a table read with _scan_columns, then drop the columns only the filter needed"""
+        if row_filter is not None:
+            table = table.filter(row_filter)
+
+        return table.select(columns) if columns is not None else table
+
+    def _csv_options(self, source):
+        """Build read_csv arguments from the source's column projection and typed schema"""
+        options = {'usecols': self._usecols(source)}
+        schema = source.get('schema')
+        if not schema:
+            return options
+
+        columns = source.get('columns')
+        dtypes = {}
+        parse_dates = []
+        date_formats = {}
+
+        for col, spec in schema.items():
+            if columns is not None and col not in columns:
+                continue
+
+            # A spec is either a dtype name or {"type": ..., "format": ...}
+            if not isinstance(spec, dict):
+                spec = {'type': spec}
+
+            if spec['type'] in ('date', 'datetime'):
+                parse_dates.append(col)
+                if spec.get('format'):
+                    date_formats[col] = spec['format']
+            else:
+                dtypes[col] = spec['type']
+
+        options['dtype'] = dtypes
+        if parse_dates:
+            options['parse_dates'] = parse_dates
+            options['date_format'] = date_formats or None
+
+        return options
+
+    def _usecols(self, source):
+        """Build a read_csv usecols filter from the source's column projection"""
+        columns = source.get('columns')
+        if columns is None:
+            return None
+
+        # A callable tolerates projected columns that are missing from the file
+        wanted = set(columns)
+        return lambda col: col in wanted
@@ -0,0 +1,353 @@
+"""
+Persistent run state for incremental pipeline runs
+"""
+import hashlib
+import os
+import sqlite3
+import pandas as pd
+
+# The pipeline's own state tables, as declared in database/schema.sql. ensure_state_tables
+# creates them in databases built before they existed; a test keeps the two in agreement.
+STATE_TABLES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS source_manifest (
+        manifest_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id INTEGER,
+        source_name VARCHAR(100),
+        source_path TEXT,
+        file_size INTEGER,
+        file_mtime REAL,
+        content_hash VARCHAR(64),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (run_id) REFERENCES pipeline_runs(run_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS source_watermarks (
+        source_name VARCHAR(100) PRIMARY KEY,
+        watermark_column VARCHAR(100),
+        high_water_mark BLOB,
+        run_id INTEGER,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (run_id) REFERENCES pipeline_runs(run_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS parsed_dates (
+        date_format VARCHAR(100),
+        raw_value TEXT,
+        parsed_ns INTEGER,
+        PRIMARY KEY (date_format, raw_value)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS quality_key_index (
+        table_name VARCHAR(100),
+        column_name VARCHAR(100),
+        key_value,
+        owner_key,
+        run_id INTEGER,
+        PRIMARY KEY (table_name, column_name, key_value)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS memory_reports (
+        run_id INTEGER,
+        stage VARCHAR(50),
+        execution_mode VARCHAR(20),
+        peak_bytes INTEGER,
+        retained_bytes INTEGER,
+        PRIMARY KEY (run_id, stage),
+        FOREIGN KEY (run_id) REFERENCES pipeline_runs(run_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS data_profiles (
+        profile_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id INTEGER,
+        table_name VARCHAR(100),
+        column_name VARCHAR(100),
+        row_count INTEGER,
+        null_count INTEGER,
+        distinct_estimate INTEGER,
+        min_value TEXT,
+        max_value TEXT,
+        quantiles TEXT,
+        top_values TEXT,
+        sketch TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (run_id) REFERENCES pipeline_runs(run_id)
+    )
+    """
+]
+
+def ensure_state_tables(conn):
+    """Create the state tables a database is missing and add columns added since it was built"""
+    for ddl in STATE_TABLES_DDL:
+        conn.execute(ddl)
+
+    # Key indexes created before owners were tracked gain the column
+    if 'owner_key' not in [row[1] for row in conn.execute("PRAGMA table_info(quality_key_index)")]:
+        conn.execute("ALTER TABLE quality_key_index ADD COLUMN owner_key")
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+class PipelineStateStore:
+    """Stores source fingerprints and watermarks between pipeline runs"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        ensure_state_tables(conn)
+        return conn
+
+    def get_last_fingerprint(self, source_name):
+        """Return the fingerprint recorded for a source by the last completed run"""
+        conn = self._connect()
+        try:
+            row = conn.execute("""
+                SELECT m.source_path, m.file_size, m.file_mtime, m.content_hash
+                FROM source_manifest m
+                JOIN pipeline_runs r ON r.run_id = m.run_id
+                WHERE m.source_name = ? AND r.status = 'COMPLETED'
+                ORDER BY m.run_id DESC
+                LIMIT 1
+            """, (source_name,)).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            return None
+
+        return {'path': row[0], 'size': row[1], 'mtime': row[2], 'content_hash': row[3]}
+
+    def record_fingerprints(self, run_id, fingerprints):
+        """Write the fingerprints of the sources processed by a run"""
+        conn = self._connect()
+        try:
+            conn.executemany("""
+                INSERT INTO source_manifest (run_id, source_name, source_path, file_size, file_mtime, content_hash)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(run_id, name, fp['path'], fp['size'], fp['mtime'], fp['content_hash'])
+                  for name, fp in fingerprints.items()])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_watermark(self, source_name, watermark_column):
+        """Return the high-water mark persisted for a source, if any"""
+        conn = self._connect()
+        try:
+            row = conn.execute("""
+                SELECT high_water_mark FROM source_watermarks
+                WHERE source_name = ? AND watermark_column = ?
+            """, (source_name, watermark_column)).fetchone()
+        finally:
+            conn.close()
+
+        return row[0] if row else None
+
+    def record_watermarks(self, run_id, watermarks):
+        """Persist the high-water marks reached by a successful run"""
+        conn = self._connect()
+        try:
+            conn.executemany("""
+                INSERT OR REPLACE INTO source_watermarks (source_name, watermark_column, high_water_mark, run_id, updated_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, [(name, column, value, run_id) for name, (column, value) in watermarks.items()])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_parsed_dates(self, date_format, limit):
+        """Return up to limit date strings parsed by earlier runs, latest dates first
+
+        The result is a datetime Series indexed by the raw strings.
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute("""
+                SELECT raw_value, parsed_ns FROM parsed_dates WHERE date_format = ?
+                ORDER BY parsed_ns DESC LIMIT ?
+            """, (date_format or '', limit)).fetchall()
+        finally:
+            conn.close()
+
+        values = [row[0] for row in rows]
+        return pd.Series(pd.to_datetime([row[1] for row in rows], unit='ns'), index=values, dtype='datetime64[ns]')
+
+    def record_parsed_dates(self, date_format, parsed, limit, conn=None):
+        """Persist newly parsed date strings so later runs skip parsing them
+
+        At most limit values are kept per format; beyond that the earliest
+        dates are dropped, as recent ones are the likeliest to recur. Pass an
+        open connection to write inside its transaction.
+        """
+        parsed = parsed.dropna()
+        if len(parsed) == 0:
+            return
+
+        owned = conn is None
+        if owned:
+            conn = self._connect()
+        else:
+            ensure_state_tables(conn)
+        try:
+            conn.executemany("""
+                INSERT OR IGNORE INTO parsed_dates (date_format, raw_value, parsed_ns) VALUES (?, ?, ?)
+            """, zip([date_format or ''] * len(parsed), parsed.index, parsed.to_numpy().astype('int64').tolist()))
+
+            stored = conn.execute("SELECT COUNT(*) FROM parsed_dates WHERE date_format = ?",
+                                  (date_format or '',)).fetchone()[0]
+            if stored > limit:
+                conn.execute("""
+                    DELETE FROM parsed_dates WHERE date_format = ? AND raw_value IN (
+                        SELECT raw_value FROM parsed_dates WHERE date_format = ?
+                        ORDER BY parsed_ns LIMIT ?)
+                """, (date_format or '', date_format or '', stored - limit))
+            if owned:
+                conn.commit()
+        finally:
+            if owned:
+                conn.close()
+
+class KeyIndex:
+    """Persistent index of the unique-column values already loaded, per table and column
+
+    Keys live in a WITHOUT ROWID B-tree keyed on (table, column, value), so a
+    batch is checked with one index probe per distinct incoming key: the cost
+    follows the batch size, not the size of the loaded tables.
+
+    For upsert destinations each value is stored with the merge key (owner)
+    of the row that loaded it; reloading a value under the same owner is an
+    update, under another owner a duplicate.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def find_existing(self, table_name, column_name, values, conn=None, owners=None):
+        """Return the set of values that an earlier load already registered
+
+        With owners (the merge key of each row), only values registered under
+        a different owner are returned. Pass the open load connection to also
+        see keys registered by its uncommitted transaction.
+        """
+        pairs = self._distinct_pairs(values, owners)
+        if not pairs:
+            return set()
+
+        owned = conn is None
+        if owned:
+            conn = sqlite3.connect(self.db_path)
+        try:
+            ensure_state_tables(conn)
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS incoming_keys (key_value, owner_key)")
+            conn.execute("DELETE FROM temp.incoming_keys")
+            conn.executemany("INSERT INTO incoming_keys VALUES (?, ?)", pairs)
+            rows = conn.execute(f"""
+                SELECT i.key_value FROM incoming_keys i
+                JOIN quality_key_index k
+                  ON k.table_name = ? AND k.column_name = ? AND k.key_value = i.key_value
+                {'WHERE k.owner_key IS NOT i.owner_key' if owners is not None else ''}
+            """, (table_name, column_name)).fetchall()
+        finally:
+            if owned:
+                conn.close()
+
+        return {row[0] for row in rows}
+
+    def register(self, conn, table_name, column_name, values, run_id, owners=None):
+        """Add loaded values to the index inside the caller's load transaction
+
+        With owners, values an owner held before this load are released first,
+        so the index follows updates made by the upsert.
+        """
+        ensure_state_tables(conn)
+        pairs = self._distinct_pairs(values, owners)
+        if owners is not None:
+            conn.executemany("""
+                DELETE FROM quality_key_index WHERE table_name = ? AND column_name = ? AND owner_key = ?
+            """, [(table_name, column_name, owner) for owner in {owner for _, owner in pairs}])
+
+        conn.executemany(f"""
+            INSERT OR {'REPLACE' if owners is not None else 'IGNORE'} INTO quality_key_index
+                (table_name, column_name, key_value, owner_key, run_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(table_name, column_name, key, owner, run_id) for key, owner in pairs])
+
+    def _distinct_pairs(self, values, owners=None):
+        """Distinct (value, owner) pairs, one per value, as plain Python values
+
+        Plain values let SQLite store and compare them by their natural type.
+        """
+        if owners is None:
+            return [(key, None) for key in values.dropna().drop_duplicates().tolist()]
+
+        pairs = pd.DataFrame({'key': values, 'owner': owners}).dropna().drop_duplicates('key', keep='last')
+        return list(zip(pairs['key'].tolist(), pairs['owner'].tolist()))
+
+def fingerprint_file(path, previous=None):
+    """Fingerprint a file by size, mtime and content hash
+
+    When size and mtime match the previous fingerprint the stored hash is reused,
+    so unchanged files are never re-read.
+    """
+    stat = os.stat(path)
+    fingerprint = {'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    if _stat_matches(fingerprint, previous):
+        fingerprint['content_hash'] = previous['content_hash']
+    else:
+        fingerprint['content_hash'] = _hash_file(path)
+
+    return fingerprint
+
+def fingerprint_files(path, files, previous=None):
+    """Fingerprint a multi-file source as one unit
+
+    Size is the total, mtime the newest file and the hash covers every file
+    name and content, so adding, removing or editing any file changes it.
+    """
+    if files == [path]:
+        return fingerprint_file(path, previous)
+
+    stats = [os.stat(file_path) for file_path in files]
+    fingerprint = {
+        'path': path,
+        'size': sum(stat.st_size for stat in stats),
+        'mtime': max((stat.st_mtime for stat in stats), default=0.0)
+    }
+
+    if _stat_matches(fingerprint, previous):
+        fingerprint['content_hash'] = previous['content_hash']
+        return fingerprint
+
+    digest = hashlib.sha256()
+    for file_path in files:
+        digest.update(file_path.encode())
+        digest.update(_hash_file(file_path).encode())
+
+    fingerprint['content_hash'] = digest.hexdigest()
+    return fingerprint
+
+def _stat_matches(fingerprint, previous):
+    return (previous is not None and previous['path'] == fingerprint['path']
+            and previous['size'] == fingerprint['size'] and previous['mtime'] == fingerprint['mtime'])
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+def fingerprint_matches(current, previous):
+    """Check whether a source is unchanged since the previous fingerprint"""
+    if previous is None:
+        return False
+
+    return current['path'] == previous['path'] and current['content_hash'] == previous['content_hash']
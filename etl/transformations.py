@@ -5,120 +5,284 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 from loguru import logger
+from etl.backends import get_backend
+from etl.dates import CalendarCache, DateParser
+
+# Default email domain -> customer segment lookup table
+DEFAULT_DOMAIN_SEGMENTS = {
+    'company.com': 'Corporate',
+    'business.com': 'Corporate',
+    'corp.com': 'Corporate',
+    'gmail.com': 'Personal',
+    'yahoo.com': 'Personal',
+    'hotmail.com': 'Personal',
+    'outlook.com': 'Personal'
+}
 
 class DataTransformer:
-    """Handles data transformations for the pipeline"""
-
-    def transform_sales_data(self, df):
-        """Transform raw sales data"""
+    """Handles data transformations for the pipeline
+
+    Ownership: the transform_* methods take ownership of the frame they are
+    given and modify it in place, so callers that still need the raw frame
+    must pass a copy. Builders (create_fact_table, create_dimension_tables)
+    never modify their inputs; they return new frames that may share column
+    buffers with them. With pandas copy-on-write enabled (settings.copy_on_write)
+    shared buffers are copied lazily on the first write.
+    """
+
+    # Raw source columns read by each transform method
+    INPUT_COLUMNS = {
+        'sales': ['sale_date', 'quantity', 'amount'],
+        'products': ['product_name', 'category', 'price'],
+        'customers': ['customer_name', 'email', 'region']
+    }
+
+    # Lineage of derived columns: each output and the columns it is computed from
+    DERIVED_COLUMNS = {
+        'sales': {
+            'year': ['sale_date'],
+            'month': ['sale_date'],
+            'quarter': ['sale_date'],
+            'day_of_week': ['sale_date'],
+            'is_weekend': ['sale_date'],
+            'price_per_unit': ['amount', 'quantity'],
+            'transformed_at': []
+        },
+        'products': {
+            'price_tier': ['price'],
+            'transformed_at': []
+        },
+        'customers': {
+            'email_domain': ['email'],
+            'customer_segment': ['email_domain'],
+            'transformed_at': []
+        }
+    }
+
+    # Columns of each transformed source read by create_fact_table
+    FACT_COLUMNS = {
+        'sales': ['product_id', 'customer_id', 'amount', 'sale_date'],
+        'products': ['product_id', 'category', 'price_tier'],
+        'customers': ['customer_id', 'region', 'customer_segment']
+    }
+
+    # Built-in transform method for each source
+    TRANSFORM_METHODS = {
+        'sales': 'transform_sales_data',
+        'products': 'transform_product_data',
+        'customers': 'transform_customer_data'
+    }
+
+    # Low-cardinality dimension columns kept as categoricals in categorical mode
+    CATEGORICAL_COLUMNS = ['category', 'region', 'customer_segment', 'email_domain', 'price_tier']
+
+    def __init__(self, domain_segments=None, default_segment='Other', categorical=False, date_format=None,
+                 backend='pandas'):
+        self.domain_segments = dict(domain_segments if domain_segments is not None else DEFAULT_DOMAIN_SEGMENTS)
+        self.default_segment = default_segment
+        self.categorical = categorical
+        self.backend = get_backend(backend)
+        self.calendar = CalendarCache(self.backend)
+        self.date_parser = DateParser(date_format)
+
+    def get_input_columns(self, source_name):
+        """Return the raw columns the transform for a source reads"""
+        return self.INPUT_COLUMNS.get(source_name, [])
+
+    def get_fact_columns(self, source_name):
+        """Return the columns of a transformed source the fact table builder reads"""
+        return self.FACT_COLUMNS.get(source_name, [])
+
+    def get_derived_columns(self, source_name, consumed_columns):
+        """Return the derived columns of a source that downstream consumers read
+
+        None means every derived column is materialized.
+        """
+        if consumed_columns is None:
+            return None
+
+        return [col for col in self.DERIVED_COLUMNS.get(source_name, {}) if col in consumed_columns]
+
+    def _materialize(self, column, outputs):
+        """Check whether a derived column is among the requested outputs"""
+        return outputs is None or column in outputs
+
+    def transform_source(self, source_name, df, outputs=None):
+        """Apply the built-in transform for a source; unknown sources pass through unchanged"""
+        method = self.TRANSFORM_METHODS.get(source_name)
+        if method is None:
+            return df
+
+        return getattr(self, method)(df, outputs)
+
+    def transform_sales_data(self, df, outputs=None):
+        """Transform raw sales data
+
+        outputs limits the derived columns that are materialized (None keeps all).
+        """
         logger.info("Transforming sales data")
 
-        # Convert date strings to datetime
-        df['sale_date'] = pd.to_datetime(df['sale_date'])
+        # Convert date strings to datetime (typed sources arrive already parsed)
+        df['sale_date'] = self.date_parser.parse(df['sale_date'])
 
-        # Add derived columns
-        df['year'] = df['sale_date'].dt.year
-        df['month'] = df['sale_date'].dt.month
-        df['quarter'] = df['sale_date'].dt.quarter
-        df['day_of_week'] = df['sale_date'].dt.dayofweek
-        df['is_weekend'] = df['day_of_week'].isin([5, 6])
+        # Add derived columns, computed once per distinct date
+        calendar_columns = [col for col in ['year', 'month', 'quarter', 'day_of_week', 'is_weekend']
+                            if self._materialize(col, outputs)]
+        if calendar_columns:
+            calendar = self.calendar.features(df['sale_date'], calendar_columns)
+            for col in calendar.columns:
+                df[col] = calendar[col]
 
         # Calculate price per unit
-        df['price_per_unit'] = df['amount'] / df['quantity']
+        if self._materialize('price_per_unit', outputs):
+            df['price_per_unit'] = df['amount'] / df['quantity']
 
         # Standardize numeric fields
         df['amount'] = df['amount'].round(2)
-        df['price_per_unit'] = df['price_per_unit'].round(2)
+        if self._materialize('price_per_unit', outputs):
+            df['price_per_unit'] = df['price_per_unit'].round(2)
 
         # Handle missing values
         df['quantity'] = df['quantity'].fillna(0)
         df['amount'] = df['amount'].fillna(0)
 
         # Add transformation timestamp
-        df['transformed_at'] = datetime.now()
+        if self._materialize('transformed_at', outputs):
+            df['transformed_at'] = datetime.now()
 
         return df
 
-    def transform_product_data(self, df):
-        """Transform raw product data"""
+    def transform_product_data(self, df, outputs=None):
+        """Transform raw product data
+
+        outputs limits the derived columns that are materialized (None keeps all).
+        """
         logger.info("Transforming product data")
 
         # Standardize text fields
-        df['product_name'] = df['product_name'].str.strip().str.title()
-        df['category'] = df['category'].str.strip().str.upper()
+        df['product_name'] = self.backend.standardize_text(df['product_name'], 'title')
+        df['category'] = self._standardize_text(df['category'], 'upper')
 
         # Handle missing categories
-        df['category'] = df['category'].fillna('UNCATEGORIZED')
+        df['category'] = self._fill_missing(df['category'], 'UNCATEGORIZED')
 
         # Add price tiers
-        df['price_tier'] = pd.cut(df['price'], 
-                                  bins=[0, 50, 200, 500, float('inf')],
-                                  labels=['Budget', 'Standard', 'Premium', 'Luxury'])
+        if self._materialize('price_tier', outputs):
+            df['price_tier'] = self.backend.bucket(df['price'],
+                                                   bins=[0, 50, 200, 500, float('inf')],
+                                                   labels=['Budget', 'Standard', 'Premium', 'Luxury'])
 
         # Add transformation timestamp
-        df['transformed_at'] = datetime.now()
+        if self._materialize('transformed_at', outputs):
+            df['transformed_at'] = datetime.now()
 
-        return df
+        return self._categorize_columns(df)
 
-    def transform_customer_data(self, df):
-        """Transform raw customer data"""
+    def transform_customer_data(self, df, outputs=None):
+        """Transform raw customer data
+
+        outputs limits the derived columns that are materialized (None keeps all).
+        """
         logger.info("Transforming customer data")
 
         # Standardize text fields
-        df['customer_name'] = df['customer_name'].str.strip().str.title()
-        df['email'] = df['email'].str.strip().str.lower()
-        df['region'] = df['region'].str.strip().str.upper()
+        df['customer_name'] = self.backend.standardize_text(df['customer_name'], 'title')
+        df['email'] = self.backend.standardize_text(df['email'], 'lower')
+        df['region'] = self._standardize_text(df['region'], 'upper')
 
-        # Extract email domain
-        df['email_domain'] = df['email'].str.split('@').str[1]
+        # Extract email domain (kept as an intermediate when only the segment is needed)
+        if self._materialize('email_domain', outputs) or self._materialize('customer_segment', outputs):
+            email_domain = self.backend.split_part(df['email'], '@', 1)
+            if self._materialize('email_domain', outputs):
+                df['email_domain'] = email_domain
 
-        # Add customer segments based on email domain
-        df['customer_segment'] = df['email_domain'].apply(self._categorize_customer)
+            # Add customer segments based on email domain
+            if self._materialize('customer_segment', outputs):
+                df['customer_segment'] = self._segment_customers(email_domain)
 
         # Handle missing regions
-        df['region'] = df['region'].fillna('UNKNOWN')
+        df['region'] = self._fill_missing(df['region'], 'UNKNOWN')
 
         # Add transformation timestamp
-        df['transformed_at'] = datetime.now()
+        if self._materialize('transformed_at', outputs):
+            df['transformed_at'] = datetime.now()
+
+        return self._categorize_columns(df)
+
+    def _standardize_text(self, series, case):
+        """Strip whitespace and re-case a text column
+
+        In categorical mode the work is done once per category and the row codes
+        are remapped, so no per-row strings are materialized.
+        """
+        if not self.categorical:
+            return self.backend.standardize_text(series, case)
+
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype('category')
+
+        # Standardizing can merge categories ('Home ' and 'home'), so re-factorize them
+        standardized = getattr(series.cat.categories.str.strip().str, case)()
+        category_codes, categories = pd.factorize(standardized)
+        codes = series.cat.codes.to_numpy()
+        codes = np.where(codes >= 0, category_codes[codes], -1)
+
+        return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=series.index)
+
+    def _fill_missing(self, series, value):
+        """Fill missing values, registering the fill value as a category when needed"""
+        if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+            series = series.cat.add_categories([value])
+
+        return series.fillna(value)
+
+    def _categorize_columns(self, df):
+        """Store low-cardinality dimension columns as categoricals in categorical mode"""
+        if self.categorical:
+            for col in self.CATEGORICAL_COLUMNS:
+                if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                    df[col] = df[col].astype('category')
 
         return df
 
-    def _categorize_customer(self, email_domain):
-        """Categorize customers based on email domain"""
-        if not email_domain:
-            return 'Unknown'
+    def _segment_customers(self, email_domains):
+        """Vectorized customer segmentation: look up each distinct domain once and gather"""
+        values = email_domains.to_numpy(dtype=object)
+        codes, uniques = pd.factorize(values)
+
+        lookup = pd.Series(self.domain_segments, dtype=object)
+        unique_segments = lookup.reindex(uniques).fillna(self.default_segment).to_numpy(dtype=object)
+
+        segments = np.full(len(values), self.default_segment, dtype=object)
+        matched = codes >= 0
+        segments[matched] = unique_segments[codes[matched]]
 
-        corporate_domains = ['company.com', 'business.com', 'corp.com']
-        personal_domains = ['gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com']
+        # Missing (None, pd.NA) and empty domains are Unknown; NaN is truthy so it keeps the default
+        missing = pd.isna(values)
+        unknown = missing.copy()
+        unknown[missing] = [not isinstance(value, float) for value in values[missing]]
+        unknown[~missing] = values[~missing] == ''
+        segments[unknown] = 'Unknown'
 
-        if email_domain in corporate_domains:
-            return 'Corporate'
-        elif email_domain in personal_domains:
-            return 'Personal'
-        else:
-            return 'Other'
+        return pd.Series(segments, index=email_domains.index)
 
     def create_fact_table(self, sales_df, products_df, customers_df):
         """Create fact table by joining dimension tables"""
         logger.info("Creating fact table")
 
         # Merge sales with products
-        fact_df = sales_df.merge(products_df[['product_id', 'category', 'price_tier']], 
-                                on='product_id', 
-                                how='left')
+        fact_df = self.backend.lookup(sales_df, products_df, 'product_id', ['category', 'price_tier'])
 
         # Merge with customers
-        fact_df = fact_df.merge(customers_df[['customer_id', 'region', 'customer_segment']], 
-                               on='customer_id', 
-                               how='left')
+        fact_df = self.backend.lookup(fact_df, customers_df, 'customer_id', ['region', 'customer_segment'])
 
         # Add additional metrics
-        fact_df['revenue_category'] = pd.cut(fact_df['amount'],
-                                           bins=[0, 100, 500, 1000, float('inf')],
-                                           labels=['Small', 'Medium', 'Large', 'Enterprise'])
+        fact_df['revenue_category'] = self.backend.bucket(fact_df['amount'],
+                                                          bins=[0, 100, 500, 1000, float('inf')],
+                                                          labels=['Small', 'Medium', 'Large', 'Enterprise'])
 
         # Add date key
-        fact_df['date_key'] = fact_df['sale_date'].dt.strftime('%Y%m%d').astype(int)
+        fact_df['date_key'] = self.calendar.features(fact_df['sale_date'], ['date_key'])['date_key']
 
         return fact_df
 
@@ -143,25 +307,25 @@ class DataTransformer:
 
     def _create_date_dimension(self, dates):
         """Create date dimension table"""
-        unique_dates = pd.DataFrame({'full_date': dates.unique()})
-        unique_dates['full_date'] = pd.to_datetime(unique_dates['full_date'])
+        unique_dates = self.date_parser.parse(pd.Series(dates.unique()))
+        calendar = self.calendar.features(unique_dates)
 
         date_dim = pd.DataFrame({
-            'date_key': unique_dates['full_date'].dt.strftime('%Y%m%d').astype(int),
-            'full_date': unique_dates['full_date'],
-            'year': unique_dates['full_date'].dt.year,
-            'quarter': unique_dates['full_date'].dt.quarter,
-            'month': unique_dates['full_date'].dt.month,
-            'day': unique_dates['full_date'].dt.day,
-            'day_of_week': unique_dates['full_date'].dt.dayofweek,
-            'is_weekend': unique_dates['full_date'].dt.dayofweek.isin([5, 6])
+            'date_key': calendar['date_key'],
+            'full_date': unique_dates,
+            'year': calendar['year'],
+            'quarter': calendar['quarter'],
+            'month': calendar['month'],
+            'day': calendar['day'],
+            'day_of_week': calendar['day_of_week'],
+            'is_weekend': calendar['is_weekend']
         })
 
         return date_dim
 
     def _create_product_dimension(self, products_df):
         """Create product dimension with SCD Type 2"""
-        product_dim = products_df.copy()
+        product_dim = products_df.copy(deep=False)
         product_dim['product_key'] = range(1, len(product_dim) + 1)
         product_dim['effective_date'] = datetime.now().date()
         product_dim['end_date'] = None
@@ -171,7 +335,7 @@ class DataTransformer:
 
     def _create_customer_dimension(self, customers_df):
         """Create customer dimension with SCD Type 2"""
-        customer_dim = customers_df.copy()
+        customer_dim = customers_df.copy(deep=False)
         customer_dim['customer_key'] = range(1, len(customer_dim) + 1)
         customer_dim['effective_date'] = datetime.now().date()
         customer_dim['end_date'] = None
@@ -0,0 +1,63 @@
+"""
+Unit tests for the column compute backends
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from etl.backends import ArrowBackend, PandasBackend, get_backend
+from etl.transformations import DataTransformer
+
+class TestComputeBackends:
+
+    @pytest.fixture
+    def text(self):
+        return pd.Series([' john doe ', None, np.nan, 'JANE@Company.com', 'noat', 'a@b@c', ''])
+
+    @pytest.mark.parametrize('case', ['upper', 'lower', 'title'])
+    def test_standardize_text_matches_pandas(self, text, case):
+        expected = PandasBackend().standardize_text(text, case)
+        result = ArrowBackend().standardize_text(text, case)
+
+        pd.testing.assert_series_equal(result, expected)
+        # Missing markers are preserved row by row
+        assert result[1] is None and result[2] is not None and np.isnan(result[2])
+
+    def test_split_part_matches_pandas(self, text):
+        expected = PandasBackend().split_part(text, '@', 1)
+        result = ArrowBackend().split_part(text, '@', 1)
+
+        pd.testing.assert_series_equal(result, expected)
+        assert list(result.map(type)) == list(expected.map(type))
+
+    def test_date_parts_match_pandas(self):
+        days = pd.DatetimeIndex(['2024-01-01', '2024-02-29', '2024-06-15', '2024-12-31'])
+        expected = pd.DataFrame(PandasBackend().date_parts(days))
+        result = pd.DataFrame(ArrowBackend().date_parts(days))
+
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_bucket_matches_pd_cut(self):
+        prices = pd.Series([0.0, 50.0, 50.01, 200.0, 999.0, np.nan, -5.0], index=list('abcdefg'))
+        bins = [0, 50, 200, 500, float('inf')]
+        labels = ['Budget', 'Standard', 'Premium', 'Luxury']
+
+        pd.testing.assert_series_equal(ArrowBackend().bucket(prices, bins, labels),
+                                       PandasBackend().bucket(prices, bins, labels))
+
+    def test_lookup_preserves_left_order(self):
+        left = pd.DataFrame({'product_id': [3, 1, 9, 3], 'amount': [1.0, 2.0, 3.0, 4.0]}, index=[7, 5, 6, 8])
+        right = pd.DataFrame({'product_id': [1, 3], 'category': pd.Categorical(['HOME', 'TECH'])})
+
+        expected = PandasBackend().lookup(left, right, 'product_id', ['category'])
+        result = ArrowBackend().lookup(left, right, 'product_id', ['category'])
+
+        pd.testing.assert_frame_equal(result, expected)
+        assert list(result['category'].astype(object).fillna('-')) == ['TECH', 'HOME', '-', 'TECH']
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            get_backend('polars')
+
+    def test_default_backend_is_pandas(self):
+        assert get_backend().name == 'pandas'
+        assert DataTransformer().backend.name == 'pandas'
@@ -0,0 +1,55 @@
+"""
+Unit tests for frame compaction
+"""
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from etl.compaction import FrameCompactor
+
+class TestFrameCompactor:
+
+    def test_downcasts_integers_to_smallest_type(self):
+        df = pd.DataFrame({'small': [1, 2, 3], 'wide': [1, 2, 70000], 'negative': [-1, 0, 1]})
+
+        result = FrameCompactor().compact(df)
+
+        assert result['small'].dtype == np.int8
+        assert result['wide'].dtype == np.int32
+        assert result['negative'].dtype == np.int8
+        assert list(result['wide']) == [1, 2, 70000]
+
+    def test_downcasts_nullable_integers(self):
+        df = pd.DataFrame({'id': pd.array([1, None, 300], dtype='Int64'),
+                           'count': pd.array([1, 2, None], dtype='UInt32')})
+
+        result = FrameCompactor().compact(df)
+
+        assert result['id'].dtype == 'Int16'
+        assert result['count'].dtype == 'UInt8'
+        assert result['id'].isna().tolist() == [False, True, False]
+        assert list(result['id'].dropna()) == [1, 300]
+
+    def test_downcasts_floats_only_when_lossless(self):
+        df = pd.DataFrame({'exact': [100.0, 50.5, np.nan], 'inexact': [19.99, 5.0, 1.0]})
+
+        result = FrameCompactor().compact(df)
+
+        assert result['exact'].dtype == np.float32
+        assert result['inexact'].dtype == np.float64
+
+    def test_folds_constant_columns_into_attrs(self):
+        stamp = datetime(2024, 1, 1, 12, 0)
+        df = pd.DataFrame({'sale_id': [1, 2, 3], 'region': ['N', 'N', 'N'], 'transformed_at': [stamp] * 3})
+
+        result = FrameCompactor().compact(df, fold_constants=True, keep=['sale_id', 'region'])
+
+        assert list(result.columns) == ['sale_id', 'region']
+        assert result.attrs['constants'] == {'transformed_at': pd.Timestamp(stamp)}
+
+    def test_excluded_columns_are_untouched(self):
+        df = pd.DataFrame({'sale_id': [1, 2, 3], 'quantity': [1, 2, 3]})
+
+        result = FrameCompactor(exclude=['sale_id']).compact(df)
+
+        assert result['sale_id'].dtype == np.int64
+        assert result['quantity'].dtype == np.int8
@@ -0,0 +1,64 @@
+"""
+Unit tests for the process-pool transform executor
+"""
+import pytest
+import pandas as pd
+from etl.parallel import ParallelTransformer, from_ipc, to_ipc
+from etl.transformations import DataTransformer
+
+class TestParallelTransformer:
+
+    @pytest.fixture
+    def sample_customer_data(self):
+        return pd.DataFrame({
+            'customer_id': list(range(1, 8)),
+            'customer_name': [' john doe', 'JANE SMITH ', 'bob johnson', 'ann lee', 'tom hardy', 'sue park', 'al green'],
+            'email': ['John@gmail.com', 'jane@company.com', 'bob@yahoo.com', 'ann@corp.com', None, 'sue@x.org', 'al@gmail.com'],
+            'region': ['North', 'south ', 'East', None, 'North', 'West', 'east']
+        })
+
+    def test_ipc_round_trip_preserves_index(self):
+        df = pd.DataFrame({'a': [1, 2, 3], 'b': ['x', None, 'z']}, index=[10, 11, 12])
+
+        pd.testing.assert_frame_equal(from_ipc(to_ipc(df)), df)
+
+    def test_split_keeps_row_order(self):
+        executor = ParallelTransformer(DataTransformer(), max_workers=2, partition_rows=3)
+        df = pd.DataFrame({'a': range(7)})
+
+        parts = executor._split(df)
+
+        assert [len(part) for part in parts] == [3, 3, 1]
+        pd.testing.assert_frame_equal(pd.concat(parts), df)
+
+    @pytest.mark.parametrize('categorical', [False, True])
+    def test_parallel_matches_serial(self, sample_customer_data, categorical):
+        transformer = DataTransformer(categorical=categorical)
+        expected = transformer.transform_customer_data(sample_customer_data.copy())
+
+        with ParallelTransformer(transformer, max_workers=2, partition_rows=3) as executor:
+            result = executor.transform({'customers': (sample_customer_data.copy(), None, None)})['customers']
+
+        # Category order depends on which partition saw a value first
+        pd.testing.assert_frame_equal(result.drop(columns='transformed_at'),
+                                      expected.drop(columns='transformed_at'), check_categorical=False)
+        if categorical:
+            assert isinstance(result['region'].dtype, pd.CategoricalDtype)
+
+    def test_pool_is_reused_until_closed(self, sample_customer_data):
+        with ParallelTransformer(DataTransformer(), max_workers=2, partition_rows=3) as executor:
+            executor.transform({'customers': (sample_customer_data.copy(), None, None)})
+            pool = executor._executor
+            executor.transform({'customers': (sample_customer_data.copy(), None, None)})
+
+            assert executor._executor is pool
+
+        assert executor._executor is None
+
+    def test_should_parallelize(self):
+        executor = ParallelTransformer(DataTransformer(), max_workers=2, partition_rows=3)
+
+        assert not executor.should_parallelize([pd.DataFrame({'a': range(3)})])
+        assert executor.should_parallelize([pd.DataFrame({'a': range(2)}), pd.DataFrame({'a': range(2)})])
+        assert not ParallelTransformer(DataTransformer(), max_workers=1, partition_rows=3).should_parallelize(
+            [pd.DataFrame({'a': range(10)})])
@@ -6,9 +6,14 @@ import os
 import json
 import sqlite3
 import pandas as pd
+from pathlib import Path
 from etl.pipeline import SalesDataPipeline
 from etl.transformations import DataTransformer
 from etl.quality_checks import DataQualityManager
+from etl.dates import DateParser
+from etl.parallel import ParallelTransformer
+from etl.pushdown import PushdownQualityExecutor
+from etl.state import PipelineStateStore, ensure_state_tables
 
 class TestSalesDataPipeline:
 
@@ -165,7 +170,7 @@ class TestSalesDataPipeline:
     def test_pipeline_error_handling(self, test_config, monkeypatch):
         """Test pipeline error handling"""
         # Simulate an error during extraction
-        def mock_extract(self):
+        def mock_extract(self, sources=None):
             raise Exception("Simulated extraction error")
 
         monkeypatch.setattr(SalesDataPipeline, 'extract', mock_extract)
@@ -210,4 +215,709 @@ class TestSalesDataPipeline:
         # Check some validations fail
         assert results['not_null_columns']['passed'] == False
         assert results['unique_columns']['passed'] == False
-        assert results['numeric_ranges']['passed'] == False
\ No newline at end of file
+        assert results['numeric_ranges']['passed'] == False
+
+    def _update_config(self, config_path, **settings):
+        """Merge extra settings into a test configuration file"""
+        with open(config_path) as f:
+            config = json.load(f)
+        config.setdefault('settings', {}).update(settings)
+        with open(config_path, 'w') as f:
+            json.dump(config, f)
+
+    def _set_merge_key(self, config_path, merge_key):
+        """Upsert into the test destination instead of appending"""
+        with open(config_path) as f:
+            config = json.load(f)
+        config['destinations'][0]['merge_key'] = merge_key
+        with open(config_path, 'w') as f:
+            json.dump(config, f)
+
+    def test_pipeline_extract_batches(self, test_config, test_sales_data):
+        """Test chunked extraction honours settings.batch_size"""
+        self._update_config(test_config, batch_size=2)
+        pipeline = SalesDataPipeline(test_config)
+
+        chunks = list(pipeline.extract_batches())
+
+        assert [name for name, _ in chunks] == ['sales', 'sales', 'sales']
+        assert [len(chunk) for _, chunk in chunks] == [2, 2, 1]
+
+    def test_pipeline_run_streaming(self, test_config, test_sales_data, test_database):
+        """Test streaming run loads every batch"""
+        self._update_config(test_config, batch_size=2, streaming=True)
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+
+        assert pipeline.run() == True
+
+        conn = sqlite3.connect(test_database)
+        sales = pd.read_sql_query("SELECT * FROM sales", conn)
+        runs = pd.read_sql_query("SELECT * FROM pipeline_runs", conn)
+        conn.close()
+
+        assert len(sales) == 5
+        assert runs['records_processed'][0] == 5
+
+    def test_pipeline_transform_parallel(self, test_config, test_sales_data):
+        """Test process-pool transform matches the serial transform"""
+        pipeline = SalesDataPipeline(test_config)
+        extracted_data = pipeline.extract()
+        expected = pipeline.transform({name: df.copy() for name, df in extracted_data.items()})['sales']
+
+        self._update_config(test_config, transform_workers=2, transform_partition_rows=2)
+        result = SalesDataPipeline(test_config).transform(extracted_data)['sales']
+
+        pd.testing.assert_frame_equal(result.drop(columns='transformed_at'),
+                                      expected.drop(columns='transformed_at'))
+
+    def test_pipeline_streaming_reuses_worker_pool(self, test_config, test_sales_data, test_database, monkeypatch):
+        """Test every streaming chunk of a run is transformed on one worker pool"""
+        self._update_config(test_config, streaming=True, batch_size=2, transform_workers=2, transform_partition_rows=1)
+        pools = []
+        original = ParallelTransformer.transform
+        monkeypatch.setattr(ParallelTransformer, 'transform',
+                            lambda executor, jobs: pools.append(executor._pool()) or original(executor, jobs))
+
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+        assert pipeline.run() == True
+
+        # The last single-row chunk is below partition_rows and stays serial
+        assert len(pools) == 2
+        assert all(pool is pools[0] for pool in pools)
+        assert pipeline._transform_executor is None
+
+    def test_pipeline_run_copy_on_write(self, test_config, test_sales_data, test_database):
+        """Test copy-on-write runs load every record and leave the global pandas option untouched"""
+        self._update_config(test_config, copy_on_write=True, memory_report=True)
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+
+        assert pipeline.run() == True
+        assert pd.get_option('mode.copy_on_write') == False
+
+        conn = sqlite3.connect(test_database)
+        sales = pd.read_sql_query("SELECT * FROM sales", conn)
+        conn.close()
+
+        assert len(sales) == 5
+
+    def test_pipeline_memory_report_compares_modes(self, test_config, test_sales_data, test_database):
+        """Test memory reports are stored per execution mode for before/after comparison"""
+        self._set_merge_key(test_config, 'sale_id')
+        for copy_on_write in [False, True]:
+            self._update_config(test_config, copy_on_write=copy_on_write, memory_report=True)
+            pipeline = SalesDataPipeline(test_config)
+            pipeline.db_path = test_database
+            assert pipeline.run() == True
+
+        conn = sqlite3.connect(test_database)
+        reports = pd.read_sql_query("SELECT * FROM memory_reports ORDER BY run_id, stage", conn)
+        conn.close()
+
+        assert list(reports['execution_mode'].unique()) == ['default', 'copy_on_write']
+        assert set(reports['stage']) == {'extract', 'transform', 'load'}
+        assert (reports['peak_bytes'] > 0).all()
+
+    def test_pipeline_compaction(self, test_config, test_sales_data, test_database):
+        """Test compaction downcasts extracted columns and folds unread constants"""
+        self._update_config(test_config, compaction=True, compaction_exclude=['sale_id'])
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+
+        extracted = pipeline.extract()['sales']
+        transformed = pipeline.transform({'sales': extracted})['sales']
+
+        assert extracted['quantity'].dtype == 'int8'
+        assert extracted['sale_id'].dtype == 'int64'
+        assert 'transformed_at' not in transformed.columns
+        assert 'transformed_at' in transformed.attrs['constants']
+        assert pipeline.load({'sales': transformed}) == 5
+
+    def _drop_primary_key(self, db_path):
+        """Recreate the test sales table without its primary key so repeated appends succeed"""
+        conn = sqlite3.connect(db_path)
+        conn.executescript("""
+            DROP TABLE sales;
+            CREATE TABLE sales (sale_id INTEGER, product_id INTEGER, customer_id INTEGER,
+                                quantity INTEGER, amount DECIMAL(10, 2), sale_date DATE);
+        """)
+        conn.close()
+
+    def test_pipeline_key_index_detects_cross_run_duplicates(self, test_config, test_sales_data, test_database):
+        """Test unique keys appended by an earlier run are reported as a separate check"""
+        self._drop_primary_key(test_database)
+        self._update_config(test_config, key_index=True)
+
+        for _ in range(2):
+            pipeline = SalesDataPipeline(test_config)
+            pipeline.db_path = test_database
+            assert pipeline.run() == True
+
+        conn = sqlite3.connect(test_database)
+        logs = pd.read_sql_query("""
+            SELECT run_id, check_result, details FROM data_quality_logs
+            WHERE check_type = 'unique_across_runs' ORDER BY run_id
+        """, conn)
+        conn.close()
+
+        assert list(logs['check_result']) == [1, 0]
+        assert json.loads(logs['details'][1]) == {'duplicate_counts': {'sale_id': 5}}
+
+    @pytest.mark.parametrize('fail_on_error', [False, True])
+    def test_pipeline_key_index_streaming(self, test_config, test_sales_data, test_database, fail_on_error):
+        """Test duplicates split across streamed chunks are caught, also inside one load transaction"""
+        df = pd.read_csv(test_sales_data)
+        df.loc[4, 'sale_id'] = 1
+        df.to_csv(test_sales_data, index=False)
+        self._drop_primary_key(test_database)
+        self._update_config(test_config, key_index=True, streaming=True, batch_size=2)
+        self._set_quality_checks(test_config, fail_on_error=fail_on_error)
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+
+        assert pipeline.run() == True
+
+        conn = sqlite3.connect(test_database)
+        failed = pd.read_sql_query("""
+            SELECT details FROM data_quality_logs
+            WHERE check_type = 'unique_across_runs' AND check_result = 0
+        """, conn)
+        conn.close()
+
+        assert [json.loads(details) for details in failed['details']] == [{'duplicate_counts': {'sale_id': 1}}]
+
+    def test_pipeline_key_index_skips_merge_destinations(self, test_config, test_sales_data, test_database):
+        """Test reprocessing keys into an upsert destination is not reported as a duplicate"""
+        self._set_merge_key(test_config, 'sale_id')
+        self._update_config(test_config, key_index=True)
+
+        for _ in range(2):
+            pipeline = SalesDataPipeline(test_config)
+            pipeline.db_path = test_database
+            assert pipeline.run() == True
+
+        conn = sqlite3.connect(test_database)
+        logs = pd.read_sql_query("SELECT * FROM data_quality_logs WHERE check_type = 'unique_across_runs'", conn)
+        conn.close()
+
+        assert len(logs) == 0
+        assert pipeline.quality_gate.failed_checks == []
+
+    def test_pipeline_key_index_merge_destination_checks_other_keys(self, test_config, test_database, tmp_path):
+        """Test an email loaded again under another customer_id is caught by an upsert destination"""
+        with open(test_config) as f:
+            config = json.load(f)
+        config['sources'] = [{"name": "customers", "type": "csv", "path": str(tmp_path / "customers.csv")}]
+        config['destinations'] = [{"name": "customers_table", "source": "customers", "type": "database",
+                                   "table": "customers", "merge_key": "customer_id"}]
+        config['settings'] = {"key_index": True}
+        with open(test_config, 'w') as f:
+            json.dump(config, f)
+
+        conn = sqlite3.connect(test_database)
+        conn.execute("""
+            CREATE TABLE customers (customer_id INTEGER PRIMARY KEY, customer_name VARCHAR(100),
+                                    email VARCHAR(100), region VARCHAR(50))
+        """)
+        conn.close()
+
+        # The second run reloads customer 1 unchanged and adds customer 3 with customer 2's email
+        runs = [([1, 2], ['a@x.com', 'b@x.com']), ([1, 3], ['a@x.com', 'b@x.com'])]
+        for customer_ids, emails in runs:
+            pd.DataFrame({
+                'customer_id': customer_ids,
+                'customer_name': ['Ann', 'Bob'],
+                'email': emails,
+                'region': ['North', 'South']
+            }).to_csv(tmp_path / "customers.csv", index=False)
+
+            pipeline = SalesDataPipeline(test_config)
+            pipeline.db_path = test_database
+            assert pipeline.run() == True
+
+        conn = sqlite3.connect(test_database)
+        logs = pd.read_sql_query("""
+            SELECT details FROM data_quality_logs WHERE check_type = 'unique_across_runs' ORDER BY log_id
+        """, conn)
+        conn.close()
+
+        assert [json.loads(details) for details in logs['details']] == [
+            {'duplicate_counts': {}}, {'duplicate_counts': {'email': 1}}]
+
+    def test_pipeline_profiling_persists_profiles(self, test_config, test_sales_data, test_database):
+        """Test profiles are persisted per run and compared for drift with the previous run"""
+        self._set_merge_key(test_config, 'sale_id')
+        self._update_config(test_config, profiling=True, streaming=True, batch_size=2)
+
+        for _ in range(2):
+            pipeline = SalesDataPipeline(test_config)
+            pipeline.db_path = test_database
+            assert pipeline.run() == True
+
+        conn = sqlite3.connect(test_database)
+        profiles = pd.read_sql_query("SELECT * FROM data_profiles WHERE column_name = 'amount'", conn)
+        drift = pd.read_sql_query("SELECT * FROM data_quality_logs WHERE check_type = 'distribution_drift'", conn)
+        conn.close()
+
+        assert list(profiles['row_count']) == [5, 5]
+        assert json.loads(profiles['quantiles'][0])[2] == 100.0
+        assert list(drift['check_result']) == [1]
+
+    def test_pipeline_post_load_checks(self, test_config, test_sales_data, test_database):
+        """Test post-load checks run as SQL against the target table"""
+        self._update_config(test_config, post_load_checks=True, streaming=True, batch_size=2)
+
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+        assert pipeline.run() == True
+
+        conn = sqlite3.connect(test_database)
+        checks = pd.read_sql_query("SELECT * FROM data_quality_logs WHERE check_type LIKE 'post_load_%'", conn)
+        conn.close()
+
+        assert list(checks['table_name'].unique()) == ['sales']
+        assert len(checks) == 6
+        assert checks['check_result'].all()
+
+    def test_pipeline_post_load_checks_use_frame_in_memory(self, test_config, test_sales_data, test_database,
+                                                           monkeypatch):
+        """Test a batch run checks its loaded frame in pandas until the table holds more than the frame"""
+        relations = []
+        validate_sql = PushdownQualityExecutor.validate_sql
+
+        def spy(executor, conn, table_name, relation):
+            relations.append(relation)
+            return validate_sql(executor, conn, table_name, relation)
+
+        monkeypatch.setattr(PushdownQualityExecutor, 'validate_sql', spy)
+        self._drop_primary_key(test_database)
+        self._update_config(test_config, post_load_checks=True)
+
+        for _ in range(2):
+            pipeline = SalesDataPipeline(test_config)
+            pipeline.db_path = test_database
+            assert pipeline.run() == True
+
+        conn = sqlite3.connect(test_database)
+        checks = pd.read_sql_query("""
+            SELECT run_id, check_result FROM data_quality_logs WHERE check_type = 'post_load_unique_columns'
+        """, conn)
+        conn.close()
+
+        # The second run appended to the first, so only SQL sees the whole table and its duplicates
+        assert relations == ['sales']
+        assert list(checks['check_result']) == [1, 0]
+
+    def test_pipeline_post_load_checks_upsert_with_earlier_rows(self, test_config, test_sales_data, test_database,
+                                                                monkeypatch):
+        """Test an upsert into a table with earlier rows is checked in SQL even when the row counts match"""
+        relations = []
+        validate_sql = PushdownQualityExecutor.validate_sql
+
+        def spy(executor, conn, table_name, relation):
+            relations.append(relation)
+            return validate_sql(executor, conn, table_name, relation)
+
+        monkeypatch.setattr(PushdownQualityExecutor, 'validate_sql', spy)
+        # A duplicate key in the frame plus one unrelated older row: 5 rows in the table and in the frame
+        df = pd.read_csv(test_sales_data)
+        df.loc[4, 'sale_id'] = 1
+        df.to_csv(test_sales_data, index=False)
+        conn = sqlite3.connect(test_database)
+        conn.execute("INSERT INTO sales VALUES (99, 101, 201, -5, 10.0, '2024-01-01 00:00:00')")
+        conn.commit()
+        conn.close()
+        self._set_merge_key(test_config, 'sale_id')
+        self._update_config(test_config, post_load_checks=True)
+
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+        assert pipeline.run() == True
+
+        conn = sqlite3.connect(test_database)
+        checks = pd.read_sql_query("""
+            SELECT check_type, check_result FROM data_quality_logs WHERE check_type LIKE 'post_load_%'
+        """, conn)
+        conn.close()
+
+        assert relations == ['sales']
+        # The older row's negative quantity is only in the table, not in the frame
+        results = dict(zip(checks['check_type'], checks['check_result']))
+        assert results['post_load_numeric_ranges'] == 0
+        assert results['post_load_unique_columns'] == 1
+
+    def test_pipeline_persists_date_cache(self, test_config, test_sales_data, test_database, monkeypatch):
+        """Test parsed date strings are stored and seed the parser of the next run"""
+        self._set_merge_key(test_config, 'sale_id')
+        self._update_config(test_config, persist_date_cache=True)
+
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+        assert pipeline.run() == True
+
+        # The second run finds every date in the seeded cache and parses nothing
+        parsed_batches = []
+        original = DateParser._to_datetime
+        monkeypatch.setattr(DateParser, '_to_datetime',
+                            lambda parser, values: parsed_batches.append(values) or original(parser, values))
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+        assert pipeline.run() == True
+
+        conn = sqlite3.connect(test_database)
+        parsed = pd.read_sql_query("SELECT * FROM parsed_dates", conn)
+        conn.close()
+
+        assert len(parsed) == 5
+        assert parsed_batches == []
+
+    def test_pipeline_persists_date_cache_per_batch(self, test_config, test_sales_data, test_database, monkeypatch):
+        """Test a streaming run persists each batch's new date strings as it goes"""
+        self._update_config(test_config, persist_date_cache=True, streaming=True, batch_size=2)
+        recorded = []
+        original = PipelineStateStore.record_parsed_dates
+        monkeypatch.setattr(PipelineStateStore, 'record_parsed_dates',
+                            lambda store, date_format, parsed, limit, conn=None:
+                            recorded.append(len(parsed)) or original(store, date_format, parsed, limit, conn))
+
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+        assert pipeline.run() == True
+
+        # One call per batch and a final (empty) one; nothing is held back until the run ends
+        assert recorded == [2, 2, 1, 0]
+        assert len(pipeline.transformer.date_parser.drain_new()) == 0
+
+    def test_state_tables_match_schema(self):
+        """Test the state tables created for older databases match database/schema.sql"""
+        from_schema = sqlite3.connect(':memory:')
+        with open(Path(__file__).parent.parent / 'database' / 'schema.sql') as f:
+            from_schema.executescript(f.read())
+        migrated = sqlite3.connect(':memory:')
+        ensure_state_tables(migrated)
+
+        tables = [row[0] for row in migrated.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+                  if row[0] != 'sqlite_sequence']
+        for table in tables:
+            pragma = f"PRAGMA table_info({table})"
+            assert migrated.execute(pragma).fetchall() == from_schema.execute(pragma).fetchall(), table
+
+        # A key index from before owners were tracked gains the column
+        old = sqlite3.connect(':memory:')
+        old.execute("CREATE TABLE quality_key_index (table_name, column_name, key_value, run_id, "
+                    "PRIMARY KEY (table_name, column_name, key_value)) WITHOUT ROWID")
+        ensure_state_tables(old)
+        assert 'owner_key' in [row[1] for row in old.execute("PRAGMA table_info(quality_key_index)")]
+
+    def test_parsed_dates_are_capped(self, test_database):
+        """Test the persisted date cache keeps the latest dates up to the limit"""
+        store = PipelineStateStore(test_database)
+        dates = ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05']
+        store.record_parsed_dates('%Y-%m-%d', pd.Series(pd.to_datetime(dates), index=dates), limit=3)
+
+        seeded = store.get_parsed_dates('%Y-%m-%d', limit=10)
+
+        assert list(seeded.index) == ['2024-01-05', '2024-01-04', '2024-01-03']
+
+    def _set_quality_checks(self, config_path, **options):
+        """Merge quality_checks options into a test configuration file"""
+        with open(config_path) as f:
+            config = json.load(f)
+        config['quality_checks'].update(options)
+        with open(config_path, 'w') as f:
+            json.dump(config, f)
+
+    def _write_bad_sales(self, csv_path):
+        """Overwrite the test sales source with a negative quantity"""
+        df = pd.read_csv(csv_path)
+        df.loc[0, 'quantity'] = -1
+        df.to_csv(csv_path, index=False)
+
+    def test_pipeline_quality_gate_fails_before_load(self, test_config, test_sales_data, test_database):
+        """Test fail_on_error stops at the first check that makes the threshold unreachable"""
+        self._write_bad_sales(test_sales_data)
+        self._set_quality_checks(test_config, fail_on_error=True)
+
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+        assert pipeline.run() == False
+
+        conn = sqlite3.connect(test_database)
+        runs = pd.read_sql_query("SELECT * FROM pipeline_runs", conn)
+        sales = pd.read_sql_query("SELECT * FROM sales", conn)
+        checks = pd.read_sql_query("SELECT check_type FROM data_quality_logs", conn)
+        conn.close()
+
+        assert runs['status'][0] == 'FAILED'
+        assert 'threshold' in runs['error_message'][0]
+        assert len(sales) == 0
+        # The remaining checks were skipped once numeric_ranges failed
+        assert list(checks['check_type']) == ['required_columns', 'not_null_columns', 'numeric_ranges']
+
+    def test_pipeline_quality_gate_warns_without_fail_on_error(self, test_config, test_sales_data, test_database):
+        """Test a pass ratio below the threshold only warns without fail_on_error"""
+        self._write_bad_sales(test_sales_data)
+
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+        assert pipeline.run() == True
+
+        assert pipeline.quality_gate.total == 6
+        assert pipeline.quality_gate.failed_checks == ['sales.numeric_ranges']
+
+    def test_pipeline_quality_gate_rolls_back_streamed_batches(self, test_config, test_sales_data, test_database):
+        """Test a gate failure in a later batch rolls back the batches loaded before it"""
+        df = pd.read_csv(test_sales_data)
+        df.loc[4, 'quantity'] = -1
+        df.to_csv(test_sales_data, index=False)
+        self._update_config(test_config, batch_size=2, streaming=True)
+        self._set_quality_checks(test_config, fail_on_error=True)
+
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+        assert pipeline.run() == False
+
+        conn = sqlite3.connect(test_database)
+        runs = pd.read_sql_query("SELECT * FROM pipeline_runs", conn)
+        sales = pd.read_sql_query("SELECT * FROM sales", conn)
+        checks = pd.read_sql_query("SELECT check_type, check_result FROM data_quality_logs", conn)
+        conn.close()
+
+        assert runs['status'][0] == 'FAILED'
+        assert len(sales) == 0
+        # Results of every batch are still logged once the transaction ends
+        assert len(checks) == 18
+        assert checks['check_result'].sum() == 17
+
+    def test_pipeline_quality_gate_streaming_judges_ratio_so_far(self, test_config, test_sales_data, test_database):
+        """Test a streaming gate stops on the ratio after a whole batch, not on an unreachable bound"""
+        self._write_bad_sales(test_sales_data)
+        self._update_config(test_config, batch_size=2, streaming=True)
+        self._set_quality_checks(test_config, fail_on_error=True)
+
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+        assert pipeline.run() == False
+
+        conn = sqlite3.connect(test_database)
+        runs = pd.read_sql_query("SELECT * FROM pipeline_runs", conn)
+        checks = pd.read_sql_query("SELECT check_type FROM data_quality_logs", conn)
+        conn.close()
+
+        assert not pipeline.quality_gate.bounded
+        assert 'pass ratio so far 83.33%' in runs['error_message'][0]
+        assert 'can no longer be met' not in runs['error_message'][0]
+        # Every check of the first batch ran before the gate judged it
+        assert len(checks) == 6
+
+    def test_pipeline_quality_gate_expects_registered_checks(self, test_config, test_sales_data, test_database,
+                                                            monkeypatch):
+        """Test a check added to the registry is expected and counted by the gate"""
+        checks = dict(DataQualityManager.CHECKS)
+        checks['row_count'] = lambda manager, df, rules: {'passed': len(df) > 10, 'details': {'rows': len(df)}}
+        monkeypatch.setattr(DataQualityManager, 'CHECKS', checks)
+        self._set_quality_checks(test_config, fail_on_error=True)
+
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+        assert pipeline.run() == False
+
+        assert pipeline.quality_gate.total == 7
+        assert pipeline.quality_gate.failed_checks == ['sales.row_count']
+
+    def test_pipeline_quality_checks_disabled(self, test_config, test_sales_data, test_database):
+        """Test disabled quality checks are skipped entirely"""
+        self._write_bad_sales(test_sales_data)
+        self._set_quality_checks(test_config, enabled=False, fail_on_error=True)
+
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+        assert pipeline.run() == True
+
+        conn = sqlite3.connect(test_database)
+        checks = pd.read_sql_query("SELECT * FROM data_quality_logs", conn)
+        conn.close()
+
+        assert pipeline.quality_gate is None
+        assert len(checks) == 0
+
+    def test_pipeline_extract_parallel(self, test_config, test_sales_data, tmp_path):
+        """Test concurrent extraction returns every source in config order"""
+        pd.DataFrame({'product_id': [101, 102], 'product_name': ['A', 'B'],
+                      'category': ['Home', 'Books'], 'price': [10.0, 20.0]}).to_csv(tmp_path / "products.csv", index=False)
+
+        with open(test_config) as f:
+            config = json.load(f)
+        config['sources'].append({"name": "products", "type": "csv", "path": str(tmp_path / "products.csv")})
+        config['settings'] = {"extract_workers": 2}
+        with open(test_config, 'w') as f:
+            json.dump(config, f)
+
+        extracted_data = SalesDataPipeline(test_config).extract()
+
+        assert list(extracted_data) == ['sales', 'products']
+        assert len(extracted_data['sales']) == 5
+        assert len(extracted_data['products']) == 2
+
+    def test_pipeline_extract_parallel_error(self, test_config, test_sales_data, tmp_path):
+        """Test a failing source is re-raised from the worker pool"""
+        with open(test_config) as f:
+            config = json.load(f)
+        config['sources'].append({"name": "products", "type": "csv", "path": str(tmp_path / "missing.csv")})
+        config['settings'] = {"extract_workers": 2}
+        with open(test_config, 'w') as f:
+            json.dump(config, f)
+
+        pipeline = SalesDataPipeline(test_config)
+
+        with pytest.raises(FileNotFoundError):
+            pipeline.extract()
+
+    def test_pipeline_extract_prunes_columns(self, test_config, test_sales_data):
+        """Test unused source columns are never read when pruning is enabled"""
+        df = pd.read_csv(test_sales_data)
+        df['store_notes'] = 'unused'
+        df.to_csv(test_sales_data, index=False)
+        self._update_config(test_config, prune_columns=True)
+
+        extracted_data = SalesDataPipeline(test_config).extract()
+
+        assert 'store_notes' not in extracted_data['sales'].columns
+        assert 'sale_date' in extracted_data['sales'].columns
+        assert 'amount' in extracted_data['sales'].columns
+
+    def test_pipeline_transform_prunes_derived_columns(self, test_config, test_sales_data):
+        """Test derived columns nothing downstream reads are not materialized"""
+        self._update_config(test_config, prune_derived_columns=True)
+        pipeline = SalesDataPipeline(test_config)
+
+        transformed = pipeline.transform(pipeline.extract())['sales']
+
+        # The sales table and the fact builder read none of the calendar or unit-price columns
+        for col in ['year', 'month', 'price_per_unit', 'transformed_at']:
+            assert col not in transformed.columns
+        for col in ['sale_id', 'product_id', 'customer_id', 'amount', 'sale_date']:
+            assert col in transformed.columns
+
+    @pytest.mark.parametrize('prune', [False, True])
+    @pytest.mark.parametrize('categorical', [False, True])
+    def test_pipeline_plan_and_builtin_columns_match(self, test_config, test_sales_data, tmp_path, prune,
+                                                     categorical):
+        """Test plans produce the columns and dtypes of the built-in transforms under the same settings"""
+        pd.DataFrame({
+            'product_id': [101, 102], 'product_name': [' widget', 'GADGET '],
+            'category': ['home', None], 'price': [10.0, 300.0]
+        }).to_csv(tmp_path / "products.csv", index=False)
+        pd.DataFrame({
+            'customer_id': [201, 202], 'customer_name': [' ann lee', 'BOB'],
+            'email': ['Ann@gmail.com', 'bob@corp.com'], 'region': ['north ', None]
+        }).to_csv(tmp_path / "customers.csv", index=False)
+
+        with open(test_config) as f:
+            config = json.load(f)
+        config['sources'] += [{"name": name, "type": "csv", "path": str(tmp_path / f"{name}.csv")}
+                              for name in ('products', 'customers')]
+        with open(test_config, 'w') as f:
+            json.dump(config, f)
+        self._update_config(test_config, prune_derived_columns=prune, categorical_dimensions=categorical)
+        builtin = SalesDataPipeline(test_config)
+        expected = builtin.transform(builtin.extract())
+
+        with open(Path(__file__).parent.parent / 'config' / 'pipeline_config.json') as f:
+            specs = json.load(f)['transformations']
+        with open(test_config) as f:
+            config = json.load(f)
+        config['transformations'] = specs
+        with open(test_config, 'w') as f:
+            json.dump(config, f)
+        planned = SalesDataPipeline(test_config)
+        result = planned.transform(planned.extract())
+
+        for source_name in ('sales', 'products', 'customers'):
+            assert list(result[source_name].columns) == list(expected[source_name].columns)
+            pd.testing.assert_series_equal(result[source_name].dtypes, expected[source_name].dtypes)
+        assert ('year' in result['sales'].columns) == (not prune)
+        # Nearly unique text columns stay plain strings even in categorical mode
+        assert result['customers']['email'].dtype == object
+
+    def test_pipeline_incremental_skips_unchanged_sources(self, test_config, test_sales_data, test_database):
+        """Test a second incremental run skips sources whose fingerprint is unchanged"""
+        with open(test_config) as f:
+            config = json.load(f)
+        config['destinations'][0]['merge_key'] = 'sale_id'
+        config['settings'] = {"incremental": True}
+        with open(test_config, 'w') as f:
+            json.dump(config, f)
+
+        for _ in range(2):
+            pipeline = SalesDataPipeline(test_config)
+            pipeline.db_path = test_database
+            assert pipeline.run() == True
+
+        # Changing the file content makes the source eligible again
+        df = pd.read_csv(test_sales_data)
+        df.loc[len(df)] = [6, 101, 201, 1, 25.0, '2024-01-06']
+        df.to_csv(test_sales_data, index=False)
+
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+        assert pipeline.run() == True
+
+        conn = sqlite3.connect(test_database)
+        runs = pd.read_sql_query("SELECT * FROM pipeline_runs ORDER BY run_id", conn)
+        manifest = pd.read_sql_query("SELECT * FROM source_manifest ORDER BY run_id", conn)
+        conn.close()
+
+        assert runs['records_processed'].tolist() == [5, 0, 6]
+        assert manifest['run_id'].tolist() == [1, 3]
+        assert manifest['content_hash'][0] != manifest['content_hash'][1]
+
+    def test_pipeline_database_watermark(self, test_config, test_database):
+        """Test watermarked database sources only fetch rows above the last high-water mark"""
+        with open(test_config) as f:
+            config = json.load(f)
+        config['sources'] = [{
+            "name": "sales",
+            "type": "database",
+            "query": "SELECT sale_id, product_id, customer_id, quantity, amount, sale_date FROM raw_sales",
+            "watermark_column": "sale_id"
+        }]
+        config['destinations'][0]['merge_key'] = 'sale_id'
+        with open(test_config, 'w') as f:
+            json.dump(config, f)
+
+        conn = sqlite3.connect(test_database)
+        raw_sales = pd.DataFrame({
+            'sale_id': [1, 2, 3],
+            'product_id': [101, 102, 103],
+            'customer_id': [201, 202, 203],
+            'quantity': [1, 2, 3],
+            'amount': [10.0, 20.0, 30.0],
+            'sale_date': ['2024-01-01', '2024-01-02', '2024-01-03']
+        })
+        raw_sales.to_sql('raw_sales', conn, index=False)
+        conn.close()
+
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+        assert pipeline.run() == True
+
+        conn = sqlite3.connect(test_database)
+        raw_sales.iloc[:2].assign(sale_id=[4, 5]).to_sql('raw_sales', conn, index=False, if_exists='append')
+        conn.close()
+
+        pipeline = SalesDataPipeline(test_config)
+        pipeline.db_path = test_database
+        assert pipeline.run() == True
+
+        conn = sqlite3.connect(test_database)
+        runs = pd.read_sql_query("SELECT * FROM pipeline_runs ORDER BY run_id", conn)
+        watermark = conn.execute("SELECT high_water_mark FROM source_watermarks WHERE source_name = 'sales'").fetchone()
+        sales = pd.read_sql_query("SELECT * FROM sales", conn)
+        conn.close()
+
+        assert runs['records_processed'].tolist() == [3, 2]
+        assert watermark[0] == 5
+        assert len(sales) == 5
@@ -0,0 +1,67 @@
+"""
+Unit tests for mergeable column profiles
+"""
+import json
+import pytest
+import numpy as np
+import pandas as pd
+from etl.profiling import ColumnProfile, DataProfile
+
+class TestDataProfile:
+
+    @pytest.fixture
+    def sample_data(self):
+        rng = np.random.default_rng(3)
+        n = 20000
+        df = pd.DataFrame({
+            'sale_id': np.arange(n),
+            'amount': rng.lognormal(3, 1, n),
+            'region': rng.choice(['NORTH', 'SOUTH', 'EAST', 'WEST'], n, p=[0.4, 0.3, 0.2, 0.1]),
+            'sale_date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, n), 'D')
+        })
+        df.loc[rng.random(n) < 0.1, 'amount'] = np.nan
+        return df
+
+    def test_chunked_profile_matches_whole(self, sample_data):
+        whole = DataProfile().update(sample_data)
+        chunked = DataProfile()
+        for start in range(0, len(sample_data), 3000):
+            chunked.update(sample_data.iloc[start:start + 3000])
+
+        for col in sample_data.columns:
+            assert chunked.columns[col].count == whole.columns[col].count
+            assert chunked.columns[col].nulls == whole.columns[col].nulls
+            assert chunked.columns[col].min == whole.columns[col].min
+            np.testing.assert_array_equal(chunked.columns[col].registers, whole.columns[col].registers)
+
+    def test_sketch_estimates(self, sample_data):
+        profile = DataProfile().update(sample_data)
+        amount = profile.columns['amount']
+
+        assert profile.columns['sale_id'].distinct_estimate() == pytest.approx(20000, rel=0.05)
+        assert profile.columns['region'].distinct_estimate() == 4
+        assert amount.nulls == sample_data['amount'].isna().sum()
+        assert amount.quantiles([0.5])[0] == pytest.approx(sample_data['amount'].median(), rel=0.02)
+        assert [value for value, _ in profile.columns['region'].top_values(2)] == ['NORTH', 'SOUTH']
+
+    def test_workers_merge(self, sample_data):
+        left = DataProfile().update(sample_data.iloc[:8000])
+        right = DataProfile().update(sample_data.iloc[8000:])
+
+        merged = left.merge(right)
+
+        assert merged.columns['amount'].count == len(sample_data)
+        assert merged.columns['sale_id'].max == len(sample_data) - 1
+
+    def test_serialized_profile_detects_drift(self, sample_data):
+        baseline = DataProfile().update(sample_data)
+        restored = DataProfile({col: ColumnProfile.from_dict(json.loads(json.dumps(profile.to_dict())))
+                                for col, profile in baseline.columns.items()})
+
+        same = DataProfile().update(sample_data.sample(frac=0.5, random_state=1)).drift(restored)
+        shifted = sample_data.assign(amount=sample_data['amount'] * 2, region='NORTH')
+        drifted = DataProfile().update(shifted).drift(restored)
+
+        assert max(same.values()) < 0.05
+        assert drifted['amount'] > 0.2
+        assert drifted['region'] > 0.2
@@ -0,0 +1,88 @@
+"""
+Unit tests for SQL pushdown quality checks
+"""
+import pytest
+import sqlite3
+import numpy as np
+import pandas as pd
+from etl.quality_checks import DataQualityManager
+from etl.pushdown import PushdownQualityExecutor
+
+class TestPushdownQualityExecutor:
+
+    @pytest.fixture
+    def sales_data(self):
+        rng = np.random.default_rng(11)
+        n = 500
+        df = pd.DataFrame({
+            'sale_id': rng.integers(0, 400, n).astype(float),
+            'product_id': rng.integers(1, 50, n).astype(float),
+            'customer_id': rng.integers(1, 50, n),
+            'quantity': rng.integers(-5, 1100, n),
+            'amount': np.where(rng.random(n) < 0.1, 0.0, rng.random(n) * 2000000),
+            'sale_date': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 7300, n), 'D')
+        })
+        df.loc[rng.random(n) < 0.05, 'sale_id'] = np.nan
+        df.loc[rng.random(n) < 0.05, 'product_id'] = np.nan
+        df.loc[rng.random(n) < 0.05, 'sale_date'] = pd.NaT
+        df.loc[rng.random(n) < 0.05, 'amount'] = np.nan
+        return df
+
+    @pytest.fixture
+    def customer_data(self):
+        return pd.DataFrame({
+            'customer_id': [1, 2, 2, 3],
+            'customer_name': ['A', None, 'C', 'D'],
+            'email': ['a@x.com', 'b.x.com', None, 'd@x.com'],
+            'region': ['North', 'South', 'East', 'West']
+        })
+
+    @pytest.fixture
+    def conn(self):
+        conn = sqlite3.connect(':memory:')
+        yield conn
+        conn.close()
+
+    @pytest.fixture
+    def executor(self):
+        return PushdownQualityExecutor(DataQualityManager())
+
+    def test_sales_results_match_pandas(self, executor, conn, sales_data):
+        """Test the generated SQL reports the same violations as the pandas checks"""
+        sales_data.to_sql('sales', conn, index=False)
+
+        expected = executor.validate('sales', df=sales_data)
+        result = executor.validate('sales', conn=conn)
+
+        assert result == expected
+        assert not result['numeric_ranges']['passed']
+        assert not result['unique_columns']['passed']
+
+    def test_customer_results_match_pandas(self, executor, conn, customer_data):
+        """Test null, duplicate and email checks match on a text table"""
+        customer_data.to_sql('stg_customers', conn, index=False)
+
+        expected = executor.validate('customers', df=customer_data)
+        result = executor.validate('customers', conn=conn, relation='stg_customers')
+
+        assert result == expected
+        assert result['custom_checks']['details']['issues'] == ["2 customers have invalid email formats"]
+
+    def test_missing_columns_are_skipped(self, executor, conn):
+        """Test rules on absent columns are reported as missing instead of failing the query"""
+        pd.DataFrame({'product_id': [1, 2], 'price': [0.0, 5.0]}).to_sql('products', conn, index=False)
+
+        result = executor.validate('products', conn=conn)
+
+        assert result['required_columns']['details']['missing_columns'] == ['product_name', 'category']
+        assert result['custom_checks']['details']['issues'] == ["1 products have zero or negative prices"]
+
+    def test_compile_binds_values(self, executor):
+        """Test rule values are bound as parameters rather than inlined"""
+        sql, params, outputs = executor.compile('products', 'products', ['product_id', 'product_name', 'price'])
+
+        assert sql.endswith('FROM "products"')
+        assert params == [0, 10000, 0]
+        assert outputs == ['row_count', 'null:product_id', 'null:product_name', 'below:price', 'above:price',
+                           'duplicate:product_id', 'custom:0']
+
@@ -0,0 +1,98 @@
+"""
+Unit tests for the fused quality check engine
+"""
+import pytest
+import sqlite3
+import numpy as np
+import pandas as pd
+from etl.quality_checks import DataQualityManager
+from etl.quality_engine import FusedQualityEngine
+from etl.pushdown import PushdownQualityExecutor
+
+class TestFusedQualityEngine:
+
+    @pytest.fixture
+    def sales_data(self):
+        rng = np.random.default_rng(7)
+        n = 500
+        df = pd.DataFrame({
+            'sale_id': rng.integers(0, 400, n),
+            'product_id': rng.integers(1, 50, n).astype(float),
+            'customer_id': rng.integers(1, 50, n),
+            'quantity': rng.integers(-5, 1100, n),
+            'amount': np.where(rng.random(n) < 0.1, 0.0, rng.random(n) * 2000000),
+            'sale_date': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 7300, n), 'D')
+        })
+        df.loc[rng.random(n) < 0.05, 'product_id'] = np.nan
+        df.loc[rng.random(n) < 0.05, 'sale_date'] = pd.NaT
+        df.loc[rng.random(n) < 0.05, 'amount'] = np.nan
+        return df
+
+    @pytest.fixture
+    def reference(self):
+        return DataQualityManager()
+
+    @pytest.fixture
+    def fused(self):
+        manager = DataQualityManager(fused=True)
+        # Small blocks so the sample spans several of them
+        manager.engine = FusedQualityEngine(manager.date_parser, block_rows=64)
+        return manager
+
+    def test_sales_results_match_reference(self, reference, fused, sales_data):
+        expected = reference.validate_data(sales_data, 'sales')
+
+        assert fused.validate_data(sales_data, 'sales') == expected
+        assert not expected['custom_checks']['passed']
+        assert not expected['numeric_ranges']['passed']
+
+    def test_products_and_customers_match_reference(self, reference, fused):
+        products = pd.DataFrame({'product_id': [1, 2, 2, None], 'product_name': ['A', None, 'C', 'D'],
+                                 'category': ['X'] * 4, 'price': [0.0, -1.0, 20000.0, np.nan]})
+        customers = pd.DataFrame({'customer_id': [1, 2, 2, 3], 'customer_name': ['A', np.nan, 'C', 'D'],
+                                  'email': ['a@x.com', 'bx.com', None, 'a@x.com'], 'region': ['N'] * 4})
+
+        for table_name, df in [('products', products), ('customers', customers)]:
+            assert fused.validate_data(df, table_name) == reference.validate_data(df, table_name)
+
+    def test_date_strings_are_parsed(self, reference, fused):
+        df = pd.DataFrame({'sale_id': [1, 2], 'product_id': [1, 2], 'customer_id': [1, 2], 'quantity': [1, 0],
+                           'amount': [0.0, 5.0], 'sale_date': ['2024-01-01', '2200-01-01']})
+
+        result = fused.validate_data(df, 'sales')
+
+        assert result == reference.validate_data(df, 'sales')
+        assert result['custom_checks']['details']['issues'] == [
+            '1 records have quantity but zero amount', '1 records have future sale dates']
+
+    def test_nullable_columns_with_missing_values(self, reference, fused):
+        """Test predicates over nullable integer columns treat NA as not matching"""
+        df = pd.DataFrame({'sale_id': pd.array([1, 2, 3], dtype='Int64'),
+                           'product_id': pd.array([1, 2, 3], dtype='Int32'),
+                           'customer_id': pd.array([1, 2, None], dtype='Int32'),
+                           'quantity': pd.array([1, None, 2], dtype='Int32'),
+                           'amount': [0.0, 0.0, 5.0],
+                           'sale_date': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03'])})
+
+        result = fused.validate_data(df, 'sales')
+
+        assert result == reference.validate_data(df, 'sales')
+        assert result['custom_checks']['details']['issues'] == ['1 records have quantity but zero amount']
+
+    def test_added_rule_reaches_every_path(self, reference, fused):
+        """Test a custom check added to the rules is enforced by pandas, fused and SQL checks alike"""
+        rule = ("{count} products are in the Misc category", [('category', '==', 'Misc')])
+        products = pd.DataFrame({'product_id': [1, 2, 3], 'product_name': ['A', 'B', 'C'],
+                                 'category': ['Misc', 'Home', 'Misc'], 'price': [1.0, 2.0, 3.0]})
+        conn = sqlite3.connect(':memory:')
+        products.to_sql('products', conn, index=False)
+
+        results = []
+        for manager in [reference, fused]:
+            manager.rules['products']['custom_checks'].append(rule)
+            results.append(manager.validate_data(products, 'products'))
+        results.append(PushdownQualityExecutor(reference).validate('products', conn=conn))
+        conn.close()
+
+        for result in results:
+            assert result['custom_checks']['details']['issues'] == ['2 products are in the Misc category']
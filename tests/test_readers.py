@@ -0,0 +1,268 @@
+"""
+Unit tests for source readers
+"""
+import json
+import pytest
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from etl.readers import SourceReader
+
+class TestSourceReader:
+
+    @pytest.fixture
+    def reader(self, tmp_path):
+        return SourceReader(str(tmp_path / "test_analytics.db"))
+
+    @pytest.fixture
+    def sample_sales_table(self):
+        return pa.table({
+            'sale_id': list(range(1, 11)),
+            'product_id': [101, 102, 103, 101, 102, 103, 101, 102, 103, 101],
+            'amount': [10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0, 80.0, 90.0, 100.0],
+            'sale_date': ['2024-01-%02d' % day for day in range(1, 11)]
+        })
+
+    @pytest.fixture
+    def parquet_path(self, tmp_path, sample_sales_table):
+        path = tmp_path / "sales.parquet"
+        pq.write_table(sample_sales_table, path, row_group_size=4)
+        return str(path)
+
+    @pytest.fixture
+    def arrow_path(self, tmp_path, sample_sales_table):
+        path = tmp_path / "sales.arrow"
+        with pa.OSFile(str(path), 'wb') as sink:
+            with pa.ipc.new_file(sink, sample_sales_table.schema) as writer:
+                writer.write_table(sample_sales_table, max_chunksize=4)
+        return str(path)
+
+    def test_read_csv(self, reader, tmp_path):
+        path = tmp_path / "sales.csv"
+        pd.DataFrame({'sale_id': [1, 2, 3]}).to_csv(path, index=False)
+
+        df = reader.read({'name': 'sales', 'type': 'csv', 'path': str(path)})
+
+        assert list(df['sale_id']) == [1, 2, 3]
+
+    def test_read_parquet_projection_and_filter(self, reader, parquet_path):
+        source = {
+            'name': 'sales',
+            'type': 'parquet',
+            'path': parquet_path,
+            'columns': ['sale_id', 'amount'],
+            'filters': [['sale_id', '>', 6]]
+        }
+
+        df = reader.read(source)
+
+        assert list(df.columns) == ['sale_id', 'amount']
+        assert list(df['sale_id']) == [7, 8, 9, 10]
+
+    def test_read_parquet_row_groups(self, reader, parquet_path):
+        source = {'name': 'sales', 'type': 'parquet', 'path': parquet_path, 'row_groups': [1]}
+
+        df = reader.read(source)
+
+        assert list(df['sale_id']) == [5, 6, 7, 8]
+
+    def test_read_parquet_row_groups_filter_outside_projection(self, reader, parquet_path):
+        source = {
+            'name': 'sales',
+            'type': 'parquet',
+            'path': parquet_path,
+            'row_groups': [0, 1],
+            'columns': ['sale_id'],
+            'filters': [['amount', '>', 25.0]]
+        }
+
+        df = reader.read(source)
+        batches = list(reader.read_batches(source, batch_size=3))
+
+        assert list(df.columns) == ['sale_id']
+        assert list(df['sale_id']) == [3, 4, 5, 6, 7, 8]
+        assert pd.concat(batches)['sale_id'].tolist() == [3, 4, 5, 6, 7, 8]
+        assert all(list(batch.columns) == ['sale_id'] for batch in batches)
+
+    def test_read_arrow_ipc(self, reader, arrow_path):
+        source = {
+            'name': 'sales',
+            'type': 'arrow_ipc',
+            'path': arrow_path,
+            'columns': ['sale_id', 'sale_date'],
+            'filters': [['product_id', '==', 101]]
+        }
+
+        df = reader.read(source)
+
+        assert list(df.columns) == ['sale_id', 'sale_date']
+        assert list(df['sale_id']) == [1, 4, 7, 10]
+
+    def test_read_batches_parquet(self, reader, parquet_path):
+        source = {'name': 'sales', 'type': 'parquet', 'path': parquet_path, 'filters': [['sale_id', '<=', 7]]}
+
+        batches = list(reader.read_batches(source, batch_size=3))
+
+        assert all(len(batch) <= 3 for batch in batches)
+        assert pd.concat(batches)['sale_id'].tolist() == [1, 2, 3, 4, 5, 6, 7]
+
+    def test_unsupported_source_type(self, reader):
+        with pytest.raises(ValueError):
+            reader.read({'name': 'sales', 'type': 'xml', 'path': 'sales.xml'})
+
+    def test_read_csv_column_projection(self, reader, tmp_path):
+        path = tmp_path / "sales.csv"
+        pd.DataFrame({'sale_id': [1, 2], 'amount': [5.0, 6.0], 'notes': ['x', 'y']}).to_csv(path, index=False)
+
+        df = reader.read({'name': 'sales', 'type': 'csv', 'path': str(path), 'columns': ['sale_id', 'amount', 'missing']})
+
+        assert list(df.columns) == ['sale_id', 'amount']
+
+    def test_read_csv_typed_schema(self, reader, tmp_path):
+        path = tmp_path / "sales.csv"
+        pd.DataFrame({
+            'sale_id': [1, 2],
+            'region': ['North', 'South'],
+            'amount': [5.0, 6.5],
+            'sale_date': ['01/02/2024', '03/04/2024']
+        }).to_csv(path, index=False)
+        source = {
+            'name': 'sales',
+            'type': 'csv',
+            'path': str(path),
+            'schema': {
+                'sale_id': 'int32',
+                'region': 'category',
+                'amount': 'float64',
+                'sale_date': {'type': 'date', 'format': '%m/%d/%Y'}
+            }
+        }
+
+        df = reader.read(source)
+
+        assert df['sale_id'].dtype == 'int32'
+        assert isinstance(df['region'].dtype, pd.CategoricalDtype)
+        assert pd.api.types.is_datetime64_any_dtype(df['sale_date'])
+        assert df['sale_date'][1] == pd.Timestamp('2024-03-04')
+
+    def test_read_csv_shipped_schema_allows_missing_values(self, reader, tmp_path):
+        """Test the shipped sales schema reads blank ids and quantities as missing values"""
+        with open(Path(__file__).parent.parent / 'config' / 'pipeline_config.json') as f:
+            config = json.load(f)
+        source = dict(next(source for source in config['sources'] if source['name'] == 'sales'))
+        source['path'] = str(tmp_path / "sales.csv")
+        with open(source['path'], 'w') as f:
+            f.write("sale_id,product_id,customer_id,quantity,amount,sale_date\n"
+                    "1,101,201,2,10.0,2024-01-01\n"
+                    "2,102,,,20.0,2024-01-02\n")
+
+        df = reader.read(source)
+
+        assert df['quantity'].isna().tolist() == [False, True]
+        assert df['customer_id'].isna().tolist() == [False, True]
+        assert df['sale_id'].tolist() == [1, 2]
+
+    @pytest.fixture
+    def partitioned_dir(self, tmp_path):
+        root = tmp_path / "sales"
+        for sale_date in ['2024-10-01', '2024-10-02']:
+            for store in [1, 2, 10]:
+                partition = root / f"sale_date={sale_date}" / f"store={store}"
+                partition.mkdir(parents=True)
+                pd.DataFrame({'sale_id': [store * 100 + int(sale_date[-1])], 'amount': [1.0]}).to_csv(
+                    partition / "part-0.csv", index=False)
+        (root / "_SUCCESS").touch()
+        return str(root)
+
+    def test_read_glob(self, tmp_path):
+        for hour in range(3):
+            pd.DataFrame({'sale_id': [hour]}).to_csv(tmp_path / f"sales_{hour:02d}.csv", index=False)
+        reader = SourceReader(str(tmp_path / "test_analytics.db"), max_workers=2)
+
+        df = reader.read({'name': 'sales', 'type': 'csv', 'path': str(tmp_path / "sales_*.csv")})
+
+        assert df['sale_id'].tolist() == [0, 1, 2]
+
+    def test_read_hive_partitions(self, reader, partitioned_dir):
+        source = {
+            'name': 'sales',
+            'type': 'csv',
+            'path': partitioned_dir,
+            'partitioning': 'hive',
+            'partition_filters': [['sale_date', '==', '2024-10-02'], ['store', '<', 5]]
+        }
+
+        df = reader.read(source)
+
+        assert sorted(df['sale_id']) == [102, 202]
+        assert set(df['sale_date']) == {'2024-10-02'}
+        assert set(df['store']) == {'1', '2'}
+
+    def test_read_batches_hive_partitions(self, reader, partitioned_dir):
+        source = {
+            'name': 'sales',
+            'type': 'csv',
+            'path': partitioned_dir,
+            'partitioning': 'hive',
+            'partition_filters': [[['store', 'in', [10]]], [['sale_date', '=', '2024-10-01'], ['store', '=', 1]]]
+        }
+
+        df = pd.concat(reader.read_batches(source, batch_size=10))
+
+        assert sorted(df['sale_id']) == [101, 1001, 1002]
+
+    def test_read_glob_without_matches(self, reader, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            reader.read({'name': 'sales', 'type': 'csv', 'path': str(tmp_path / "missing_*.csv")})
+
+    @pytest.mark.parametrize('codec, extension', [('gzip', '.csv.gz'), ('zstd', '.csv.zst'), ('gzip', '.csv')])
+    def test_read_compressed_csv(self, reader, tmp_path, codec, extension):
+        path = str(tmp_path / f"sales{extension}")
+        with pa.CompressedOutputStream(path, codec) as sink:
+            sink.write(pd.DataFrame({'sale_id': range(1, 8)}).to_csv(index=False).encode())
+        source = {'name': 'sales', 'type': 'csv', 'path': path}
+
+        assert reader.read(source)['sale_id'].tolist() == list(range(1, 8))
+        assert [len(chunk) for chunk in reader.read_batches(source, batch_size=3)] == [3, 3, 1]
+
+    def test_read_compressed_parquet(self, reader, tmp_path, sample_sales_table):
+        path = str(tmp_path / "sales.parquet.gz")
+        with pa.CompressedOutputStream(path, 'gzip') as sink:
+            pq.write_table(sample_sales_table, sink)
+        source = {'name': 'sales', 'type': 'parquet', 'path': path, 'filters': [['sale_id', '>', 8]]}
+
+        assert reader.read(source)['sale_id'].tolist() == [9, 10]
+        assert pd.concat(reader.read_batches(source, batch_size=1))['sale_id'].tolist() == [9, 10]
+
+    def test_read_compressed_parquet_prunes_row_groups(self, reader, tmp_path, sample_sales_table):
+        path = str(tmp_path / "sales.parquet.gz")
+        with pa.CompressedOutputStream(path, 'gzip') as sink:
+            pq.write_table(sample_sales_table, sink, row_group_size=4)
+        source = {'name': 'sales', 'type': 'parquet', 'path': path, 'columns': ['amount'],
+                  'filters': [['sale_id', '>', 8]]}
+
+        fragment = next(reader._columnar_dataset(source).get_fragments())
+        _, row_filter = reader._columnar_options(source, fragment.physical_schema)
+
+        assert len(fragment.split_by_row_group(row_filter)) == 1
+        assert list(reader.read(source).columns) == ['amount']
+
+    def test_read_memory_mapped_arrow_ipc(self, reader, arrow_path):
+        source = {'name': 'sales', 'type': 'arrow_ipc', 'path': arrow_path, 'memory_map': True}
+        allocated_before = pa.total_allocated_bytes()
+
+        df = reader.read(source)
+
+        # Columns reference the mapped file rather than freshly allocated Arrow buffers
+        assert pa.total_allocated_bytes() == allocated_before
+        assert isinstance(df['sale_id'].dtype, pd.ArrowDtype)
+        assert df['sale_id'].tolist() == list(range(1, 11))
+
+    def test_read_memory_mapped_csv(self, reader, tmp_path):
+        path = tmp_path / "sales.csv"
+        pd.DataFrame({'sale_id': range(1, 6)}).to_csv(path, index=False)
+        source = {'name': 'sales', 'type': 'csv', 'path': str(path), 'memory_map': True}
+
+        assert reader.read(source)['sale_id'].tolist() == [1, 2, 3, 4, 5]
+        assert [len(chunk) for chunk in reader.read_batches(source, batch_size=2)] == [2, 2, 1]
@@ -1,11 +1,16 @@
 """
 Unit tests for data transformations
 """
+import json
+import warnings
 import pytest
+from pathlib import Path
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from etl.transformations import DataTransformer
+from etl.dates import DateParser
+from etl.plans import TransformationPlan
 
 class TestDataTransformer:
 
@@ -143,4 +148,186 @@ class TestDataTransformer:
         customer_dim = dimensions['dim_customer']
         assert 'customer_key' in customer_dim.columns
         assert 'effective_date' in customer_dim.columns
-        assert 'is_current' in customer_dim.columns
\ No newline at end of file
+        assert 'is_current' in customer_dim.columns
+
+    def test_dimension_builders_leave_inputs_unchanged(self, transformer, sample_sales_data,
+                                                       sample_product_data, sample_customer_data):
+        products_columns = list(sample_product_data.columns)
+        customers_columns = list(sample_customer_data.columns)
+
+        dimensions = transformer.create_dimension_tables(sample_sales_data, sample_product_data, sample_customer_data)
+
+        assert 'product_key' in dimensions['dim_product'].columns
+        assert list(sample_product_data.columns) == products_columns
+        assert list(sample_customer_data.columns) == customers_columns
+
+    def test_arrow_backend_matches_pandas(self, sample_sales_data, sample_product_data, sample_customer_data):
+        results = {}
+        for backend in ['pandas', 'arrow']:
+            transformer = DataTransformer(backend=backend)
+            sales = transformer.transform_sales_data(sample_sales_data.copy())
+            products = transformer.transform_product_data(sample_product_data.copy())
+            customers = transformer.transform_customer_data(sample_customer_data.copy())
+            results[backend] = [sales, products, customers,
+                                transformer.create_fact_table(sales, products, customers)]
+
+        for expected, result in zip(results['pandas'], results['arrow']):
+            pd.testing.assert_frame_equal(result.drop(columns='transformed_at'),
+                                          expected.drop(columns='transformed_at'))
+
+    def _categorize_customer(self, transformer, email_domain):
+        """Scalar segmentation rule the vectorized lookup must reproduce"""
+        if not email_domain:
+            return 'Unknown'
+
+        return transformer.domain_segments.get(email_domain, transformer.default_segment)
+
+    def test_segment_customers_matches_scalar_rules(self, transformer):
+        domains = pd.Series(['gmail.com', 'corp.com', 'example.org', None, '', np.nan, 'gmail.com'])
+
+        result = transformer._segment_customers(domains)
+
+        assert result.tolist() == [self._categorize_customer(transformer, domain) for domain in domains]
+        assert result.tolist() == ['Personal', 'Corporate', 'Other', 'Unknown', 'Unknown', 'Other', 'Personal']
+
+    def test_segment_customers_string_dtype_with_missing_values(self, transformer):
+        domains = pd.Series(['gmail.com', None, '', 'corp.com'], dtype='string')
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            result = transformer._segment_customers(domains)
+
+        assert result.tolist() == ['Personal', 'Unknown', 'Unknown', 'Corporate']
+
+    def test_segment_customers_custom_mapping(self, sample_customer_data):
+        transformer = DataTransformer(domain_segments={'yahoo.com': 'Legacy'}, default_segment='Standard')
+
+        result = transformer.transform_customer_data(sample_customer_data)
+
+        assert result['customer_segment'].tolist() == ['Standard', 'Standard', 'Legacy']
+
+    def test_categorical_mode(self, sample_product_data, sample_customer_data):
+        transformer = DataTransformer(categorical=True)
+        sample_product_data['category'] = [' Electronics', 'home', None]
+
+        products = transformer.transform_product_data(sample_product_data)
+        customers = transformer.transform_customer_data(sample_customer_data)
+
+        for col in ['category', 'price_tier']:
+            assert isinstance(products[col].dtype, pd.CategoricalDtype)
+        for col in ['region', 'email_domain', 'customer_segment']:
+            assert isinstance(customers[col].dtype, pd.CategoricalDtype)
+
+        assert products['category'].tolist() == ['ELECTRONICS', 'HOME', 'UNCATEGORIZED']
+        assert customers['region'].tolist() == ['NORTH', 'SOUTH', 'EAST']
+        assert customers['customer_segment'].tolist() == ['Personal', 'Corporate', 'Personal']
+
+    def test_calendar_cache_matches_datetime_accessors(self, transformer):
+        dates = pd.Series([pd.Timestamp('2024-01-06'), pd.Timestamp('2024-03-31'), pd.NaT,
+                           pd.Timestamp('2024-01-06 15:30')])
+
+        features = transformer.calendar.features(dates)
+
+        assert features['year'].tolist()[:2] == [2024, 2024]
+        assert features['quarter'][1] == dates.dt.quarter[1]
+        assert features['day_of_week'][1] == dates.dt.dayofweek[1]
+        assert features['is_weekend'].tolist() == [True, True, False, True]
+        assert features['date_key'][3] == 20240106
+        assert pd.isna(features['month'][2])
+
+        # Both timestamps on 2024-01-06 share a single cached calendar row
+        assert len(transformer.calendar) == 2
+
+    def test_date_parser_parses_distinct_values_once(self):
+        parser = DateParser('%Y-%m-%d')
+
+        first = parser.parse(pd.Series(['2024-01-01', '2024-01-02', '2024-01-01', None]))
+        second = parser.parse(pd.Series(['2024-01-02', '2024-01-03']))
+
+        assert first.tolist()[:3] == [pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-02'), pd.Timestamp('2024-01-01')]
+        assert pd.isna(first[3])
+        assert second.tolist() == [pd.Timestamp('2024-01-02'), pd.Timestamp('2024-01-03')]
+        assert len(parser._cache) == 3
+
+        # Already-parsed columns are handed back untouched
+        assert parser.parse(second) is second
+
+    def test_date_parser_infers_unmatched_formats(self):
+        parser = DateParser('%Y-%m-%d')
+
+        parsed = parser.parse(pd.Series(['2024-01-01', '2024-01-02 10:30:00', '2024-01-03T08:00:00']))
+
+        assert parsed.tolist() == [pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-02 10:30:00'),
+                                   pd.Timestamp('2024-01-03 08:00:00')]
+
+    def test_date_parser_seed_and_drain(self):
+        parser = DateParser('%Y-%m-%d', track_new=True)
+        parser.seed(pd.Series(pd.to_datetime(['2024-01-01']), index=['2024-01-01']))
+
+        parser.parse(pd.Series(['2024-01-01', '2024-01-02']))
+
+        assert parser.drain_new().to_dict() == {'2024-01-02': pd.Timestamp('2024-01-02')}
+        assert len(parser.drain_new()) == 0
+
+    def test_date_parser_keeps_no_new_values_untracked(self):
+        parser = DateParser('%Y-%m-%d')
+
+        parser.parse(pd.Series(['2024-01-01', '2024-01-02']))
+
+        assert len(parser.drain_new()) == 0
+
+    def _load_plan_spec(self, source_name):
+        with open(Path(__file__).parent.parent / 'config' / 'pipeline_config.json') as f:
+            return json.load(f)['transformations'][source_name]
+
+    @pytest.mark.parametrize('source_name, method', [
+        ('sales', 'transform_sales_data'),
+        ('products', 'transform_product_data'),
+        ('customers', 'transform_customer_data')
+    ])
+    def test_plan_matches_builtin_transform(self, transformer, sample_sales_data, sample_product_data,
+                                            sample_customer_data, source_name, method):
+        samples = {'sales': sample_sales_data, 'products': sample_product_data, 'customers': sample_customer_data}
+        plan = TransformationPlan.compile(source_name, self._load_plan_spec(source_name))
+
+        expected = getattr(transformer, method)(samples[source_name].copy())
+        result = plan.execute(samples[source_name].copy(), transformer)
+
+        assert list(result.columns) == list(expected.columns)
+        pd.testing.assert_frame_equal(result.drop(columns='transformed_at'), expected.drop(columns='transformed_at'))
+
+    def test_plan_drops_unused_derived_columns(self, transformer, sample_sales_data):
+        required = ['sale_id', 'product_id', 'customer_id', 'quantity', 'amount', 'sale_date', 'is_weekend']
+        plan = TransformationPlan.compile('sales', self._load_plan_spec('sales'), required)
+
+        result = plan.execute(sample_sales_data, transformer)
+
+        # Only is_weekend survives among the calendar derives, fused into one lookup step
+        assert [step['op'] for step in plan.steps] == ['cast', 'calendar', 'cast', 'fill', 'fill']
+        assert 'is_weekend' in result.columns
+        for col in ['year', 'month', 'price_per_unit', 'transformed_at']:
+            assert col not in result.columns
+        assert plan.input_columns == ['sale_date', 'amount', 'quantity']
+
+    def test_transform_materializes_only_requested_outputs(self, transformer, sample_sales_data,
+                                                          sample_customer_data):
+        sales = transformer.transform_sales_data(sample_sales_data, outputs=['is_weekend'])
+        customers = transformer.transform_customer_data(sample_customer_data, outputs=['customer_segment'])
+
+        assert 'is_weekend' in sales.columns
+        for col in ['year', 'month', 'quarter', 'day_of_week', 'price_per_unit', 'transformed_at']:
+            assert col not in sales.columns
+
+        # email_domain is computed as an intermediate but never attached to the frame
+        assert 'email_domain' not in customers.columns
+        assert list(customers['customer_segment']) == ['Personal', 'Corporate', 'Personal']
+
+    def test_derived_column_lineage(self, transformer):
+        consumed = ['sale_id', 'amount', 'price_per_unit', 'year']
+
+        assert transformer.get_derived_columns('sales', consumed) == ['year', 'price_per_unit']
+        assert transformer.get_derived_columns('sales', None) is None
+
+    def test_plan_rejects_unknown_op(self):
+        with pytest.raises(ValueError):
+            TransformationPlan.compile('sales', [{'op': 'explode', 'column': 'sale_id'}])